@@ -1,49 +1,80 @@
-import os
-from pydantic import BaseSettings
-from dotenv import load_dotenv
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
+from config.env import ensure_loaded
+
 # Load environment variables from .env file
-load_dotenv()
+ensure_loaded()
 
 class Settings(BaseSettings):
     """
     Application settings that can be configured via environment variables
     or secret files mounted in a container environment.
+    Fields are read from the environment variable of the same name when
+    the settings object is created.
     """
     # App Settings
     APP_NAME: str = "VerdeMuse"
-    ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
-    DEBUG: bool = os.getenv("DEBUG", "True").lower() == "true"
+    ENVIRONMENT: str = "development"
+    DEBUG: bool = True
     
     # API Settings
-    API_HOST: str = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
     
     # Security Settings
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
+    SECRET_KEY: str = "dev-secret-key-change-in-production"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     
     # LLM Settings
-    MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY")
-    OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
+    MISTRAL_API_KEY: Optional[str] = None
+    OPENAI_API_KEY: Optional[str] = None
     
     # Vector DB Settings
-    VECTOR_DB_PATH: str = os.getenv("VECTOR_DB_PATH", "./data/embeddings")
+    VECTOR_DB_PATH: str = "./data/embeddings"
+    VECTOR_QUANTIZATION: str = "none"  # "none" or "int8"
+    VECTOR_INDEX_TYPE: str = "flat"  # "flat", "sq", "hnsw" or "ivfpq"
+    HNSW_M: int = 32
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    IVF_NLIST: int = 100
+    IVF_NPROBE: int = 8
+    PQ_M: int = 16
+    PQ_NBITS: int = 8
+    SQ_TYPE: str = "fp16"  # "fp16" or "8bit"
+    VECTOR_USE_GPU: bool = False
+    VECTOR_SMALL_CORPUS_SIZE: int = 50000  # Below this, search with the numba kernel when available
+    EMBEDDINGS_BACKEND: str = "huggingface"  # "huggingface", "onnx" or "infinity"
+    INFINITY_URL: str = "http://localhost:7997"
+    ONNX_MODEL_DIR: str = "./data/models/all-MiniLM-L6-v2-onnx"
+    EMBEDDINGS_COMPILE: bool = False  # torch.compile the HuggingFace model
+    
+    # Redis Settings
+    REDIS_MAX_CONNECTIONS: int = 64
+    REDIS_POOL_TIMEOUT: float = 5.0  # Seconds to wait for a free pooled connection
+    
+    # Conversation Settings
+    CONVERSATION_MAX_MESSAGES: int = 100
+    CONVERSATION_HISTORY_MAXLEN: int = 20
+    CONVERSATION_SUMMARY_MODEL: str = "mistral-tiny"
+    
+    # Cache Settings
+    RESPONSE_CACHE_TTL: int = 86400
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
     
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
-
-    class Config:
-        case_sensitive = True
+    LOG_LEVEL: str = "INFO"
 
-# Create settings object to be imported elsewhere in the app
-settings = Settings()
+    # .env is already in os.environ through ensure_loaded(), so it is not parsed again here
+    model_config = SettingsConfigDict(case_sensitive=True, extra="ignore")
 
 # Environment-specific settings
-def get_settings():
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
     """
     Returns the appropriate settings based on the environment.
+    Settings are validated once and cached for the lifetime of the process.
     This can be used as a FastAPI dependency.
     """
-    return settings
\ No newline at end of file
+    return Settings()
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""
+Environment loading for VerdeMuse.
+The .env file is parsed once per process, however many modules ask for it.
+"""
+
+from dotenv import load_dotenv
+
+_LOADED = False
+
+def ensure_loaded() -> None:
+    """
+    Load variables from the .env file into os.environ on the first call.
+    Later calls return immediately.
+    """
+    global _LOADED
+    if _LOADED:
+        return
+    load_dotenv(encoding="utf-8")
+    _LOADED = True
@@ -0,0 +1,38 @@
+"""
+Logging configuration for VerdeMuse.
+Records are put on a queue by the request path and formatted and written
+by a background listener thread.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: str = "INFO") -> None:
+    """
+    Route all log records through a queue to a background writer thread.
+    Calling it again once configured has no effect.
+
+    Args:
+        level: Root log level name, e.g. "INFO" or "DEBUG"
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
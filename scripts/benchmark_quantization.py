@@ -0,0 +1,67 @@
+"""
+Script to compare single-query search over the int8 copy of the vectors
+(VECTOR_QUANTIZATION=int8) with a float32 FAISS flat index.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import faiss
+import numpy as np
+
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.infrastructure.vector_store.quantize import quantize_int8, int8_inner_product
+
+def _time_per_query(search, queries) -> float:
+    """Average wall time of search over the queries, in milliseconds."""
+    search(queries[0])
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    """Time both searches on random unit vectors and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = vectors[rng.choice(args.vectors, args.queries, replace=False)]
+
+    index = faiss.IndexFlatIP(args.dimension)
+    index.add(vectors)
+    quantized, scales = quantize_int8(vectors)
+
+    def float32_search(query):
+        return index.search(query[np.newaxis], args.k)
+
+    def int8_search(query):
+        query_vector, query_scale = quantize_int8(query)
+        scores = int8_inner_product(query_vector, query_scale, quantized, scales)
+        top = np.argpartition(-scores, args.k - 1)[:args.k]
+        return top[np.argsort(-scores[top])]
+
+    float32_ms = _time_per_query(float32_search, queries)
+    int8_ms = _time_per_query(int8_search, queries)
+    recall = np.mean([
+        len(set(int8_search(query)) & set(float32_search(query)[1][0])) / args.k
+        for query in queries
+    ])
+
+    print(f"{args.vectors} vectors of dimension {args.dimension}, {faiss.omp_get_max_threads()} threads")
+    print(f"float32 flat index: {vectors.nbytes / 2**20:8.1f} MiB  {float32_ms:7.2f} ms/query")
+    print(f"int8 blocked scan:  {(quantized.nbytes + scales.nbytes) / 2**20:8.1f} MiB  {int8_ms:7.2f} ms/query")
+    print(f"int8 recall@{args.k}: {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
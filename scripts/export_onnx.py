@@ -0,0 +1,38 @@
+"""
+Script to export the embedding model to ONNX and quantize it to int8 for the
+"onnx" embeddings backend. Weights are quantized ahead of time and activations
+dynamically at inference, using AVX-512 VNNI int8 kernels where the CPU has them.
+"""
+
+import os
+import sys
+
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+# Add the project root to the path so we can import our modules
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config.config import get_settings
+from src.infrastructure.vector_store.embeddings import EMBEDDING_MODEL
+
+def main():
+    """Export, quantize and save the model with its tokenizer to ONNX_MODEL_DIR."""
+    output_dir = get_settings().ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    model = ORTModelForFeatureExtraction.from_pretrained(EMBEDDING_MODEL, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(EMBEDDING_MODEL).save_pretrained(output_dir)
+
+    # Writes model_quantized.onnx next to the FP32 model.onnx
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantizer.quantize(
+        save_dir=output_dir,
+        quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    )
+    print(f"Saved int8 ONNX model to {output_dir}")
+
+if __name__ == "__main__":
+    main()
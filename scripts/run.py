@@ -9,13 +9,15 @@ import subprocess
 import time
 import signal
 import platform
-from dotenv import load_dotenv
 
 # Add the project root to the path so we can import our modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from config.env import ensure_loaded
+from config.config import get_settings
+
 # Load environment variables
-load_dotenv()
+ensure_loaded()
 
 # Process holders
 processes = []
@@ -26,12 +28,20 @@ def start_backend():
     port = os.getenv("API_PORT", "8000")
     print(f"\n🚀 Starting FastAPI backend on http://{host}:{port}")
     
-    backend_process = subprocess.Popen(
-        ["uvicorn", "src.api.main:app", "--host", host, "--port", port, "--reload"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True
-    )
+    command = ["uvicorn", "src.api.main:app", "--host", host, "--port", port]
+    if get_settings().ENVIRONMENT == "development":
+        command.append("--reload")
+    else:
+        # Reload pins uvicorn to a single worker; outside development use one worker per core
+        command += [
+            "--workers", str(os.cpu_count() or 1),
+            "--loop", "uvloop",
+            "--http", "httptools",
+            "--no-access-log"
+        ]
+    
+    # Output is inherited so the child writes straight to this terminal
+    backend_process = subprocess.Popen(command)
     processes.append(backend_process)
     return backend_process
 
@@ -40,26 +50,11 @@ def start_frontend():
     print("\n🌿 Starting Streamlit frontend on http://localhost:8501")
     
     frontend_process = subprocess.Popen(
-        ["streamlit", "run", "src.presentation.streamlit.app.py"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True
+        ["streamlit", "run", "src.presentation.streamlit.app.py"]
     )
     processes.append(frontend_process)
     return frontend_process
 
-def process_output(process, prefix):
-    """Process and print output from a subprocess with a prefix."""
-    while True:
-        output = process.stdout.readline()
-        if output == '' and process.poll() is not None:
-            break
-        if output:
-            print(f"{prefix} {output.strip()}")
-    
-    rc = process.poll()
-    return rc
-
 def cleanup(signum, frame):
     """Clean up processes when terminating the script."""
     print("\n🛑 Stopping VerdeMuse services...")
@@ -101,24 +96,11 @@ if __name__ == "__main__":
         print("💬 Streamlit frontend: http://localhost:8501")
         print("\nPress CTRL+C to stop all services.\n")
         
-        # Monitor outputs
-        while True:
-            backend_output = backend_process.stdout.readline()
-            if backend_output:
-                print(f"[API] {backend_output.strip()}")
-            
-            frontend_output = frontend_process.stdout.readline()
-            if frontend_output:
-                print(f"[UI] {frontend_output.strip()}")
-            
-            # Check if processes are still running
-            if backend_process.poll() is not None and frontend_process.poll() is not None:
-                print("Both services have stopped. Exiting.")
-                break
-            
-            # Small sleep to prevent high CPU usage
-            time.sleep(0.1)
-            
+        # Block until both services exit; signals still reach cleanup()
+        backend_process.wait()
+        frontend_process.wait()
+        print("Both services have stopped. Exiting.")
+        
     except KeyboardInterrupt:
         print("\nShutting down gracefully...")
     finally:
@@ -1,16 +1,67 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import os
-from dotenv import load_dotenv
+
+from config.env import ensure_loaded
+from config.config import get_settings
+from config.logging_config import setup_logging
+from src.infrastructure.llm.mistral_client import get_mistral_client, close_http_clients
+from src.infrastructure.vector_store.vector_store import get_vector_store
+from src.infrastructure.conversation_store import get_conversation_store
+from src.infrastructure.response_cache import get_response_cache
 
 # Load environment variables
-load_dotenv()
+ensure_loaded()
+
+# Format and write log records off the request path
+setup_logging(get_settings().LOG_LEVEL)
+
+# Routes answering with text/event-stream, never compressed
+STREAMING_PATHS = {"/api/chat/stream"}
+
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip compression that passes server-sent event streams through untouched."""
+
+    async def __call__(self, scope, receive, send):
+        # Compressing an event stream would buffer its tokens until the response ends
+        if scope["type"] == "http" and scope["path"] in STREAMING_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up the shared clients before the first request is served,
+    so no user pays for model loading or connection setup.
+    """
+    vector_store = get_vector_store()
+    get_mistral_client()
+    _, conversation_store, response_cache = await asyncio.gather(
+        asyncio.to_thread(vector_store.load),
+        get_conversation_store(),
+        get_response_cache()
+    )
+    expiration_watcher = asyncio.create_task(conversation_store.watch_expirations())
+    yield
+    expiration_watcher.cancel()
+    await asyncio.gather(expiration_watcher, return_exceptions=True)
+    await vector_store.aclose()
+    await conversation_store.disconnect()
+    await response_cache.disconnect()
+    await close_http_clients()
 
 # Create FastAPI app
 app = FastAPI(
     title="VerdeMuse Intelligent Customer Support API",
     description="API for VerdeMuse Intelligent Customer Support Virtual Assistant",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -22,6 +73,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (chat answers with sources) for clients that accept gzip
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=512, compresslevel=5)
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -46,9 +100,12 @@ app.include_router(chat.router, prefix="/api/chat", tags=["Chat"])
 
 if __name__ == "__main__":
     import uvicorn
+    reload = os.getenv("DEBUG", "False").lower() == "true"
     uvicorn.run(
         "src.api.main:app",
         host=os.getenv("API_HOST", "0.0.0.0"),
         port=int(os.getenv("API_PORT", 8000)),
-        reload=os.getenv("DEBUG", "False").lower() == "true"
+        reload=reload,
+        # uvloop/httptools are picked up automatically when installed
+        workers=None if reload else os.cpu_count()
     )
\ No newline at end of file
@@ -1,164 +1,370 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from typing import Dict, List, Any, Optional
-import uuid
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Any, Optional, Set, Tuple
+import asyncio
+import anyio
+import secrets
+from datetime import datetime
 import hashlib
 import json
 import logging
+import re
+import numpy as np
 from functools import lru_cache
+from cachetools import LRUCache, TTLCache
 
+from config.config import get_settings, Settings
 from src.domain.models.message import ChatRequest, ChatResponse, MessageRole
 from src.infrastructure.llm.mistral_client import get_mistral_client, MistralClient
 from src.infrastructure.vector_store.vector_store import get_vector_store, VectorStore
 from src.infrastructure.conversation_store import get_conversation_store, ConversationStore
+from src.infrastructure.response_cache import get_response_cache, ResponseCache
+from src.infrastructure.semantic_cache import get_semantic_cache, SemanticCache
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# LRU cache for LLM responses to avoid repeated expensive calls
-@lru_cache(maxsize=1000)
-def get_cached_llm_response(message_hash: str, context_hash: str) -> Optional[str]:
-    """
-    Cache LLM responses based on message and context hashes.
-    This prevents repeated expensive LLM calls for similar queries.
-    """
-    # This will be populated by the chat endpoint
-    return None
+# Bounded in-process cache of LLM responses, keyed by (message hash, context hash)
+_RESPONSE_CACHE: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+_cache_stats = {"hits": 0, "misses": 0}
+
+def get_llm_response_from_cache(message_hash: bytes, context_hash: bytes) -> Optional[str]:
+    """Get LLM response from cache if available."""
+    response = _RESPONSE_CACHE.get((message_hash, context_hash))
+    _cache_stats["hits" if response is not None else "misses"] += 1
+    return response
+
+def set_cached_llm_response(message_hash: bytes, context_hash: bytes, response: str):
+    """Store LLM response in cache, evicting the least recently used entry when full."""
+    _RESPONSE_CACHE[(message_hash, context_hash)] = response
+
+_WHITESPACE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def normalize_message(message: str) -> str:
+    """Normalize a message so trivially different phrasings share a cache entry."""
+    return _WHITESPACE.sub(" ", message.strip().lower())
+
+# Stands in for the context hash when no documents were retrieved; never 8 bytes long
+_NO_CONTEXT = b"no_context"
+
+def _content_key(body: bytes) -> bytes:
+    """Return a compact 64-bit BLAKE2b digest, plenty for cache keys."""
+    return hashlib.blake2b(body, digest_size=8).digest()
+
+def hash_message(message: str) -> bytes:
+    """Hash the normalized form of a user message for caching."""
+    return _content_key(normalize_message(message).encode())
 
-def set_cached_llm_response(message_hash: str, context_hash: str, response: str):
+def hash_context(documents: List[str]) -> bytes:
+    """Hash the retrieved documents, independent of their order, for caching."""
+    if not documents:
+        return _NO_CONTEXT
+    return _content_key("\0".join(sorted(documents)).encode())
+
+# Conversations whose summary is being updated, and the tasks updating them
+_summarizing: Set[str] = set()
+_summary_tasks: Set[asyncio.Task] = set()
+
+async def update_summary(
+    conversation_id: str,
+    messages: List[Dict[str, Any]],
+    summary: Dict[str, Any],
+    mistral_client: MistralClient,
+    conversation_store: ConversationStore
+):
+    """Fold older messages into the stored rolling summary of a conversation."""
+    try:
+        content = await mistral_client.asummarize_conversation(messages, summary.get("content"))
+        await conversation_store.set_summary(
+            conversation_id,
+            {"content": content, "covered_until": messages[-1]["timestamp"]}
+        )
+    except Exception as e:
+        logger.warning("Error summarizing conversation %s: %s", conversation_id, e)
+    finally:
+        _summarizing.discard(conversation_id)
+
+async def load_history(
+    conversation_id: str,
+    mistral_client: MistralClient,
+    conversation_store: ConversationStore,
+    settings: Settings
+) -> List[Dict[str, Any]]:
     """
-    Store LLM response in cache.
-    Uses a workaround since lru_cache doesn't support setting values directly.
+    Get the history sent to the LLM: a summary of older messages followed by
+    at most CONVERSATION_HISTORY_MAXLEN recent messages.
+    
+    Once that many messages are not covered by the summary, the older half is
+    folded into it in the background, so the summary model runs every few
+    turns rather than on every turn.
     """
-    # Create a temporary cache key storage
-    cache_key = f"{message_hash}:{context_hash}"
-    if not hasattr(set_cached_llm_response, 'cache'):
-        set_cached_llm_response.cache = {}
-    set_cached_llm_response.cache[cache_key] = response
+    maxlen = settings.CONVERSATION_HISTORY_MAXLEN
+    history, summary = await asyncio.gather(
+        conversation_store.get_conversation(conversation_id, limit=maxlen),
+        conversation_store.get_summary(conversation_id)
+    )
+    
+    if summary:
+        history = [message for message in history if message.get("timestamp", "") > summary["covered_until"]]
+    
+    if len(history) >= maxlen and conversation_id not in _summarizing:
+        _summarizing.add(conversation_id)
+        task = asyncio.create_task(update_summary(
+            conversation_id,
+            history[:max(1, len(history) // 2)],
+            summary,
+            mistral_client,
+            conversation_store
+        ))
+        _summary_tasks.add(task)
+        task.add_done_callback(_summary_tasks.discard)
+    
+    if summary:
+        history.insert(0, {"role": MessageRole.SYSTEM.value, "content": f"Summary so far: {summary['content']}"})
+    return history
 
-def get_llm_response_from_cache(message_hash: str, context_hash: str) -> Optional[str]:
-    """Get LLM response from cache if available."""
-    cache_key = f"{message_hash}:{context_hash}"
-    if hasattr(set_cached_llm_response, 'cache'):
-        return set_cached_llm_response.cache.get(cache_key)
-    return None
+# Query embeddings of recent messages, keyed by the hash of the normalized message
+_EMBED_CACHE: LRUCache = LRUCache(maxsize=4096)
 
-async def cleanup_old_conversations(conversation_store: ConversationStore):
-    """Background task to cleanup old conversations."""
+async def retrieve(message: str, vector_store: VectorStore) -> Tuple[Optional[np.ndarray], List[str]]:
+    """
+    Embed the message once and find the documents relevant to it.
+    
+    Returns:
+        The query embedding, or None if embedding failed, and the relevant documents
+    """
+    query_vector = None
     try:
-        cleaned_count = await conversation_store.cleanup_expired_conversations()
-        logger.info(f"Cleaned up {cleaned_count} expired conversations")
+        key = hash_message(message)
+        query_vector = _EMBED_CACHE.get(key)
+        if query_vector is None:
+            # Embedded and searched in a batch with concurrent requests
+            query_vector, search_results = await vector_store.abatched_search(normalize_message(message), k=3)
+            # A copy, so the cache does not keep the whole batch matrix alive or share it
+            _EMBED_CACHE[key] = query_vector.copy()
+        else:
+            search_results = await vector_store.asimilarity_search_by_vector(query_vector, k=3)
+        # If vector store is initialized, use the relevant information it finds
+        return query_vector, [doc.page_content for doc in search_results]
     except Exception as e:
-        logger.error(f"Error during conversation cleanup: {e}")
+        logger.warning("Vector search error: %s", e)
+        # Continue without context
+        return query_vector, []
+
+async def start_turn(
+    request: ChatRequest,
+    mistral_client: MistralClient,
+    vector_store: VectorStore,
+    conversation_store: ConversationStore,
+    settings: Settings,
+    record_user_message: bool = True
+) -> Tuple[str, List[Dict[str, Any]], List[str], Optional[np.ndarray]]:
+    """
+    Gather what the LLM needs to answer the user message.
+    
+    Args:
+        record_user_message: Whether to add the user message to the conversation
+            store now; callers that pass False record it themselves
+    
+    Returns:
+        The conversation ID, the summarized conversation history, the relevant
+        documents and the query embedding (None if embedding failed)
+    """
+    # Get or create conversation ID
+    conversation_id = request.conversation_id or secrets.token_hex(16)
+    
+    # Start retrieval first so it overlaps with the conversation store round-trips below
+    retrieval_task = asyncio.create_task(retrieve(request.message, vector_store))
+    
+    # Get a summary plus the most recent turns only, so the prompt sent to the LLM stays bounded
+    conversation_history = await load_history(
+        conversation_id, mistral_client, conversation_store, settings
+    )
+    
+    # Add user message to conversation store
+    if record_user_message:
+        user_message = {
+            "role": MessageRole.USER.value,
+            "content": request.message
+        }
+        await conversation_store.add_message(conversation_id, user_message)
+    
+    query_vector, relevant_documents = await retrieval_task
+    
+    return conversation_id, conversation_history, relevant_documents, query_vector
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @router.post("/", response_model=ChatResponse)
 async def chat_endpoint(
     request: ChatRequest,
-    background_tasks: BackgroundTasks,
     mistral_client: MistralClient = Depends(get_mistral_client),
     vector_store: VectorStore = Depends(get_vector_store),
-    conversation_store: ConversationStore = Depends(get_conversation_store)
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+    response_cache: ResponseCache = Depends(get_response_cache),
+    semantic_cache: SemanticCache = Depends(get_semantic_cache),
+    settings: Settings = Depends(get_settings)
 ):
     """
     Process a chat message and return a response.
     
     This endpoint:
-    1. Retrieves or creates a conversation history from Redis
-    2. Searches the vector store for relevant information
-    3. Checks cache for similar queries
-    4. Sends the user message and context to the LLM
-    5. Caches the response
+    1. Searches the vector store for relevant information while
+       retrieving or creating the conversation history in Redis
+    2. Checks the local and Redis caches for the same query and context,
+       then the semantic cache for a query with the same meaning
+    3. Sends the user message and context to the LLM
+    4. Caches the response, unless the request sets no_cache
+    5. Records the user message and the response in one write
     6. Returns the LLM's response
     """
     try:
-        # Get or create conversation ID
-        conversation_id = request.conversation_id or str(uuid.uuid4())
-        
-        # Get conversation history from Redis
-        conversation_history = await conversation_store.get_conversation(conversation_id)
-        
-        # Create message hash for caching
-        message_hash = hashlib.md5(request.message.encode()).hexdigest()
-        
-        # Add user message to conversation store
+        # The user message is stored together with the reply, in one write
         user_message = {
             "role": MessageRole.USER.value,
-            "content": request.message
+            "content": request.message,
+            "timestamp": datetime.now().isoformat()
         }
-                 await conversation_store.add_message(conversation_id, user_message)
-         
-         # Search for relevant context with error handling
-         relevant_documents = []
-         context_hash = "no_context"
-         
-         try:
-             # If vector store is initialized, search for relevant information
-             search_results = vector_store.similarity_search(request.message, k=3)
-             relevant_documents = [doc.page_content for doc in search_results]
-             
-             # Create context hash for caching
-             if relevant_documents:
-                 context_content = "\n".join(relevant_documents)
-                 context_hash = hashlib.md5(context_content.encode()).hexdigest()
-         except Exception as e:
-             logger.warning(f"Vector search error: {e}")
-             # Continue without context
-             pass
-         
-         # Check cache for LLM response
-         cached_response = get_llm_response_from_cache(message_hash, context_hash)
-         
-         if cached_response:
-             logger.debug(f"Using cached response for message: {request.message[:50]}...")
-             assistant_response = cached_response
-             sources = None
-         else:
-             # Generate response with or without context
-             if relevant_documents:
-                 assistant_response = mistral_client.generate_answer_with_context(
-                     request.message,
-                     relevant_documents,
-                     conversation_history
-                 )
-                 sources = [
-                     {"content": doc, "confidence": 0.9} 
-                     for doc in relevant_documents
-                 ]
-             else:
-                 # No relevant documents found, generate response based on conversation
-                 assistant_response = mistral_client.generate_response(
-                     request.message,
-                     conversation_history
-                 )
-                 sources = None
-             
-             # Cache the response
-             set_cached_llm_response(message_hash, context_hash, assistant_response)
-             logger.debug(f"Cached new response for message: {request.message[:50]}...")
+        conversation_id, conversation_history, relevant_documents, query_vector = await start_turn(
+            request, mistral_client, vector_store, conversation_store, settings,
+            record_user_message=False
+        )
+        
+        # Create message and context hashes for caching
+        message_hash = hash_message(request.message)
+        context_hash = hash_context(relevant_documents)
         
-        # Add assistant response to conversation store
+        # Check the in-process cache first, then the cache shared across workers
+        cached_response = None
+        if not request.no_cache:
+            cached_response = get_llm_response_from_cache(message_hash, context_hash)
+            if cached_response is None:
+                cached_response = await response_cache.get(message_hash, context_hash)
+                if cached_response is not None:
+                    set_cached_llm_response(message_hash, context_hash, cached_response)
+            if cached_response is None and query_vector is not None:
+                # Reuse the embedding computed for retrieval
+                cached_response = semantic_cache.get(query_vector, context_hash)
+        
+        sources = None
+        if relevant_documents:
+            sources = [
+                {"content": doc, "confidence": 0.9} 
+                for doc in relevant_documents
+            ]
+        
+        if cached_response:
+            logger.debug("Using cached response for message: %s...", request.message[:50])
+            assistant_response = cached_response
+        else:
+            # Generate response with or without context
+            try:
+                if relevant_documents:
+                    assistant_response = await mistral_client.agenerate_answer_with_context(
+                        request.message,
+                        relevant_documents,
+                        conversation_history
+                    )
+                else:
+                    # No relevant documents found, generate response based on conversation
+                    assistant_response = await mistral_client.agenerate_response(
+                        request.message,
+                        conversation_history
+                    )
+            except Exception:
+                # Keep the user message even though no reply was generated
+                await conversation_store.add_message(conversation_id, user_message)
+                raise
+            
+            # Cache the response
+            if not request.no_cache:
+                set_cached_llm_response(message_hash, context_hash, assistant_response)
+                await response_cache.set(message_hash, context_hash, assistant_response)
+                if query_vector is not None:
+                    semantic_cache.set(query_vector, context_hash, assistant_response)
+                logger.debug("Cached new response for message: %s...", request.message[:50])
+        
+        # Add the user message and assistant response to conversation store
         assistant_message = {
             "role": MessageRole.ASSISTANT.value,
             "content": assistant_response
         }
-        await conversation_store.add_message(conversation_id, assistant_message)
-        
-        # Schedule background cleanup
-        background_tasks.add_task(cleanup_old_conversations, conversation_store)
+        await conversation_store.add_messages(conversation_id, [user_message, assistant_message])
         
-        # Prepare response
-        response = ChatResponse(
+        # Prepare response; the fields are built here, so validation is skipped
+        response = ChatResponse.model_construct(
             message=assistant_response,
             conversation_id=conversation_id,
-            sources=sources if relevant_documents else None
+            sources=sources
         )
         
-        logger.info(f"Chat response generated for conversation {conversation_id}")
+        logger.info("Chat response generated for conversation %s", conversation_id)
         return response
         
     except Exception as e:
-        logger.error(f"Error in chat endpoint: {e}")
+        logger.error("Error in chat endpoint: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/stream")
+async def chat_stream_endpoint(
+    request: ChatRequest,
+    mistral_client: MistralClient = Depends(get_mistral_client),
+    vector_store: VectorStore = Depends(get_vector_store),
+    conversation_store: ConversationStore = Depends(get_conversation_store),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Process a chat message and stream the response as server-sent events.
+    
+    Emits a "start" event with the conversation ID and sources, one "token"
+    event per generated chunk and an "end" event when generation completes.
+    The generated text is recorded in the conversation history even if the
+    client disconnects early.
+    """
+    try:
+        conversation_id, conversation_history, relevant_documents, _ = await start_turn(
+            request, mistral_client, vector_store, conversation_store, settings
+        )
+    except Exception as e:
+        logger.error("Error in chat stream endpoint: %s", e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+    
+    sources = None
+    if relevant_documents:
+        chunks_stream = mistral_client.generate_answer_with_context_stream(
+            request.message, relevant_documents, conversation_history
+        )
+        sources = [{"content": doc, "confidence": 0.9} for doc in relevant_documents]
+    else:
+        chunks_stream = mistral_client.generate_response_stream(request.message, conversation_history)
+    
+    async def event_stream():
+        chunks = []
+        try:
+            yield format_sse("start", {"conversation_id": conversation_id, "sources": sources})
+            async for chunk in chunks_stream:
+                chunks.append(chunk)
+                yield format_sse("token", {"content": chunk})
+            yield format_sse("end", {})
+        except Exception as e:
+            logger.error("Error streaming response for conversation %s: %s", conversation_id, e)
+            yield format_sse("error", {"detail": "Internal server error"})
+        finally:
+            # Record whatever was generated so the history stays complete
+            if chunks:
+                assistant_message = {
+                    "role": MessageRole.ASSISTANT.value,
+                    "content": "".join(chunks)
+                }
+                # A client disconnect cancels the generator; shield the write so it still lands
+                with anyio.CancelScope(shield=True):
+                    await conversation_store.add_message(conversation_id, assistant_message)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.get("/{conversation_id}", response_model=List[Dict[str, Any]])
 async def get_conversation_history(
     conversation_id: str,
@@ -177,7 +383,7 @@ async def get_conversation_history(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving conversation {conversation_id}: {e}")
+        logger.error("Error retrieving conversation %s: %s", conversation_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.delete("/{conversation_id}")
@@ -198,7 +404,7 @@ async def delete_conversation(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting conversation {conversation_id}: {e}")
+        logger.error("Error deleting conversation %s: %s", conversation_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{conversation_id}/metadata")
@@ -219,7 +425,7 @@ async def get_conversation_metadata(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving metadata for conversation {conversation_id}: {e}")
+        logger.error("Error retrieving metadata for conversation %s: %s", conversation_id, e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/cleanup")
@@ -227,7 +433,7 @@ async def manual_cleanup(
     conversation_store: ConversationStore = Depends(get_conversation_store)
 ):
     """
-    Manually trigger cleanup of expired conversations.
+    Report the conversations Redis has expired; they are removed by their TTLs.
     """
     try:
         cleaned_count = await conversation_store.cleanup_expired_conversations()
@@ -237,25 +443,34 @@ async def manual_cleanup(
         }
         
     except Exception as e:
-        logger.error(f"Error during manual cleanup: {e}")
+        logger.error("Error during manual cleanup: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/stats/cache")
-async def get_cache_stats():
+async def get_cache_stats(
+    semantic_cache: SemanticCache = Depends(get_semantic_cache),
+    conversation_store: ConversationStore = Depends(get_conversation_store)
+):
     """
     Get cache statistics for monitoring.
     """
     try:
-        cache_size = 0
-        if hasattr(set_cached_llm_response, 'cache'):
-            cache_size = len(set_cached_llm_response.cache)
+        cache_size = len(_RESPONSE_CACHE)
+        cache_limit = _RESPONSE_CACHE.maxsize
+        lookups = _cache_stats["hits"] + _cache_stats["misses"]
         
         return {
             "cache_size": cache_size,
-            "cache_limit": 1000,
-            "cache_utilization": f"{(cache_size / 1000) * 100:.1f}%"
+            "cache_limit": cache_limit,
+            "cache_utilization": f"{(cache_size / cache_limit) * 100:.1f}%",
+            "hits": _cache_stats["hits"],
+            "misses": _cache_stats["misses"],
+            "hit_rate": f"{(_cache_stats['hits'] / lookups if lookups else 0) * 100:.1f}%",
+            "semantic_cache_size": len(semantic_cache),
+            "semantic_hits": semantic_cache.hits,
+            "expired_conversations": conversation_store.expired_count
         }
         
     except Exception as e:
-        logger.error(f"Error retrieving cache stats: {e}")
+        logger.error("Error retrieving cache stats: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
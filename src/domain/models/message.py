@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime
@@ -14,15 +14,17 @@ class Message(BaseModel):
     """
     Model representing a chat message in the VerdeMuse system.
     """
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: uuid.UUID = Field(default_factory=uuid.uuid4)
     role: MessageRole
     content: str
     timestamp: datetime = Field(default_factory=datetime.now)
     conversation_id: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "role": "user",
                 "content": "How do I care for my VerdeMuse plant?",
@@ -30,6 +32,7 @@ class Message(BaseModel):
                 "metadata": {"source": "web_widget", "browser": "chrome"}
             }
         }
+    )
 
 class ConversationHistory(BaseModel):
     """
@@ -69,14 +72,18 @@ class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
     user_id: Optional[str] = None
+    no_cache: bool = False
     
-    class Config:
-        schema_extra = {
+    # Fields sent by newer or older clients are ignored rather than rejected
+    model_config = ConfigDict(
+        extra="ignore",
+        json_schema_extra={
             "example": {
                 "message": "How do I care for my VerdeMuse plant?",
                 "conversation_id": "3fa85f64-5717-4562-b3fc-2c963f66afa6"
             }
         }
+    )
 
 class ChatResponse(BaseModel):
     """
@@ -87,8 +94,10 @@ class ChatResponse(BaseModel):
     sources: Optional[List[Dict[str, Any]]] = None
     confidence: Optional[float] = None
     
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        extra="forbid",
+        frozen=True,
+        json_schema_extra={
             "example": {
                 "message": "To care for your VerdeMuse plant, water it once a week and place it in indirect sunlight.",
                 "conversation_id": "3fa85f64-5717-4562-b3fc-2c963f66afa6",
@@ -97,4 +106,5 @@ class ChatResponse(BaseModel):
                 ],
                 "confidence": 0.95
             }
-        }
\ No newline at end of file
+        }
+    )
\ No newline at end of file
@@ -3,255 +3,365 @@ Conversation store implementation for VerdeMuse.
 Provides Redis-based persistent storage for conversation histories.
 """
 
-import redis
-import json
-import os
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+import redis.asyncio as redis
 import asyncio
+import orjson
+import os
+from typing import Dict, List, Any, Optional, Protocol
+from datetime import datetime
 import logging
-from config.config import settings
+from config.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-class ConversationStore:
+class ConversationStore(Protocol):
+    """
+    Interface for conversation stores used by the chat API.
+    Implementations append messages instead of rewriting the history.
+    """
+
+    expired_count: int
+
+    async def get_conversation(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        ...
+
+    async def add_message(self, conversation_id: str, message: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        ...
+
+    async def add_messages(self, conversation_id: str, messages: List[Dict[str, Any]], ttl: Optional[int] = None) -> bool:
+        ...
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        ...
+
+    async def get_conversation_metadata(self, conversation_id: str) -> Dict[str, Any]:
+        ...
+
+    async def get_summary(self, conversation_id: str) -> Dict[str, Any]:
+        ...
+
+    async def set_summary(self, conversation_id: str, summary: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        ...
+
+    async def cleanup_expired_conversations(self) -> int:
+        ...
+
+class RedisConversationStore:
     """
     Redis-based conversation store for persistent chat histories.
-    Provides async operations and automatic cleanup of old conversations.
+    Each conversation is kept as a Redis list so appending a message is O(1)
+    and the list is capped to the most recent messages.
+
+    Keys are "conversation:<id>" for messages, "conversation_meta:<id>" for
+    metadata and "conversation_summary:<id>" for the rolling summary of older
+    messages, where new IDs are 32-character hex strings (secrets.token_hex(16)).
     """
-    
-    def __init__(self, redis_url: Optional[str] = None):
+
+    def __init__(self, redis_url: Optional[str] = None, max_messages: Optional[int] = None):
         """
         Initialize the conversation store.
-        
+
         Args:
             redis_url: Redis connection URL. If None, uses environment variables.
+            max_messages: Maximum number of messages kept per conversation. If None, uses config setting.
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.max_messages = max_messages or get_settings().CONVERSATION_MAX_MESSAGES
+        # Operations beyond max_connections wait up to timeout for a free connection
+        self.pool = redis.BlockingConnectionPool.from_url(
+            self.redis_url,
+            max_connections=get_settings().REDIS_MAX_CONNECTIONS,
+            timeout=get_settings().REDIS_POOL_TIMEOUT,
+            decode_responses=True,
+            socket_keepalive=True,
+            health_check_interval=30
+        )
         self.redis_client = None
         self.default_ttl = 3600  # 1 hour default TTL
-        
+        self.expired_count = 0
+
     async def connect(self):
         """Establish Redis connection."""
         if self.redis_client is None:
             try:
-                self.redis_client = redis.from_url(
-                    self.redis_url,
-                    decode_responses=True,
-                    socket_keepalive=True,
-                    socket_keepalive_options={},
-                    health_check_interval=30
-                )
+                self.redis_client = redis.Redis(connection_pool=self.pool)
                 # Test connection
-                await asyncio.to_thread(self.redis_client.ping)
+                await self.redis_client.ping()
                 logger.info("Connected to Redis successfully")
             except Exception as e:
-                logger.error(f"Failed to connect to Redis: {e}")
-                # Fallback to in-memory storage
+                logger.error("Failed to connect to Redis: %s", e)
                 self.redis_client = None
-    
+
     async def disconnect(self):
-        """Close Redis connection."""
+        """Close Redis connection and the connections held by the pool."""
         if self.redis_client:
-            await asyncio.to_thread(self.redis_client.close)
+            await self.redis_client.aclose()
             self.redis_client = None
-    
+        await self.pool.aclose()
+
     def _get_conversation_key(self, conversation_id: str) -> str:
         """Generate Redis key for conversation."""
         return f"conversation:{conversation_id}"
-    
+
     def _get_metadata_key(self, conversation_id: str) -> str:
         """Generate Redis key for conversation metadata."""
         return f"conversation_meta:{conversation_id}"
-    
-    async def get_conversation(self, conversation_id: str) -> List[Dict[str, Any]]:
+
+    def _get_summary_key(self, conversation_id: str) -> str:
+        """Generate Redis key for conversation summary."""
+        return f"conversation_summary:{conversation_id}"
+
+    async def get_conversation(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Retrieve conversation history.
-        
+
         Args:
             conversation_id: Unique conversation identifier
-            
+            limit: Optional number of most recent messages to return
+
         Returns:
-            List of message dictionaries
+            List of message dictionaries, oldest first
         """
         if not self.redis_client:
             await self.connect()
-        
+
         try:
             key = self._get_conversation_key(conversation_id)
-            data = await asyncio.to_thread(self.redis_client.get, key)
-            
-            if data:
-                return json.loads(data)
-            return []
+            start = -limit if limit else 0
+            items = await self.redis_client.lrange(key, start, -1)
+            return [orjson.loads(item) for item in items]
         except Exception as e:
-            logger.error(f"Error retrieving conversation {conversation_id}: {e}")
+            logger.error("Error retrieving conversation %s: %s", conversation_id, e)
             return []
-    
-    async def save_conversation(
-        self, 
-        conversation_id: str, 
-        messages: List[Dict[str, Any]], 
+
+    async def add_message(
+        self,
+        conversation_id: str,
+        message: Dict[str, Any],
         ttl: Optional[int] = None
     ) -> bool:
         """
-        Save conversation history.
-        
+        Append a single message to conversation.
+
         Args:
             conversation_id: Unique conversation identifier
-            messages: List of message dictionaries
+            message: Message dictionary
             ttl: Time to live in seconds (optional)
-            
+
         Returns:
-            True if saved successfully, False otherwise
+            True if added successfully, False otherwise
         """
-        if not self.redis_client:
-            await self.connect()
-        
-        try:
-            key = self._get_conversation_key(conversation_id)
-            metadata_key = self._get_metadata_key(conversation_id)
-            
-            # Serialize messages
-            data = json.dumps(messages, default=str)
-            
-            # Save conversation data
-            ttl = ttl or self.default_ttl
-            await asyncio.to_thread(self.redis_client.setex, key, ttl, data)
-            
-            # Save metadata
-            metadata = {
-                "conversation_id": conversation_id,
-                "message_count": len(messages),
-                "last_updated": datetime.now().isoformat(),
-                "ttl": ttl
-            }
-            await asyncio.to_thread(self.redis_client.setex, metadata_key, ttl, json.dumps(metadata))
-            
-            logger.debug(f"Saved conversation {conversation_id} with {len(messages)} messages")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error saving conversation {conversation_id}: {e}")
-            return False
-    
-    async def add_message(
-        self, 
-        conversation_id: str, 
-        message: Dict[str, Any], 
+        return await self.add_messages(conversation_id, [message], ttl)
+
+    async def add_messages(
+        self,
+        conversation_id: str,
+        messages: List[Dict[str, Any]],
         ttl: Optional[int] = None
     ) -> bool:
         """
-        Add a single message to conversation.
-        
+        Append several messages to conversation in one round-trip.
+
         Args:
             conversation_id: Unique conversation identifier
-            message: Message dictionary
+            messages: Message dictionaries, oldest first
             ttl: Time to live in seconds (optional)
-            
+
         Returns:
             True if added successfully, False otherwise
         """
+        if not self.redis_client:
+            await self.connect()
+
         try:
-            # Get existing conversation
-            messages = await self.get_conversation(conversation_id)
-            
+            key = self._get_conversation_key(conversation_id)
+            metadata_key = self._get_metadata_key(conversation_id)
+            ttl = ttl or self.default_ttl
+
             # Add timestamp if not present
-            if "timestamp" not in message:
-                message["timestamp"] = datetime.now().isoformat()
-            
-            # Add new message
-            messages.append(message)
-            
-            # Save updated conversation
-            return await self.save_conversation(conversation_id, messages, ttl)
-            
+            for message in messages:
+                if "timestamp" not in message:
+                    message["timestamp"] = datetime.now().isoformat()
+
+            # Append the messages, cap the list to the most recent messages and
+            # update the metadata hash in a single round-trip
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.rpush(key, *(orjson.dumps(message, default=str) for message in messages))
+                pipe.ltrim(key, -self.max_messages, -1)
+                pipe.expire(key, ttl)
+                pipe.expire(self._get_summary_key(conversation_id), ttl)
+                pipe.hset(metadata_key, mapping={
+                    "conversation_id": conversation_id,
+                    "last_updated": datetime.now().isoformat(),
+                    "ttl": ttl
+                })
+                pipe.hincrby(metadata_key, "message_count", len(messages))
+                pipe.expire(metadata_key, ttl)
+                await pipe.execute()
+
+            return True
+
         except Exception as e:
-            logger.error(f"Error adding message to conversation {conversation_id}: {e}")
+            logger.error("Error adding messages to conversation %s: %s", conversation_id, e)
             return False
-    
+
     async def delete_conversation(self, conversation_id: str) -> bool:
         """
         Delete a conversation.
-        
+
         Args:
             conversation_id: Unique conversation identifier
-            
+
         Returns:
             True if deleted successfully, False otherwise
         """
         if not self.redis_client:
             await self.connect()
-        
+
         try:
             key = self._get_conversation_key(conversation_id)
             metadata_key = self._get_metadata_key(conversation_id)
-            
-            # Delete both conversation and metadata
-            await asyncio.to_thread(self.redis_client.delete, key, metadata_key)
-            
-            logger.debug(f"Deleted conversation {conversation_id}")
+            summary_key = self._get_summary_key(conversation_id)
+
+            # Delete conversation, metadata and summary
+            await self.redis_client.delete(key, metadata_key, summary_key)
+
+            logger.debug("Deleted conversation %s", conversation_id)
             return True
-            
+
         except Exception as e:
-            logger.error(f"Error deleting conversation {conversation_id}: {e}")
+            logger.error("Error deleting conversation %s: %s", conversation_id, e)
             return False
-    
+
     async def get_conversation_metadata(self, conversation_id: str) -> Dict[str, Any]:
         """
         Get conversation metadata.
-        
+
         Args:
             conversation_id: Unique conversation identifier
-            
+
         Returns:
-            Metadata dictionary
+            Metadata dictionary, where message_count counts every message added
+            including those trimmed from the stored history
         """
         if not self.redis_client:
             await self.connect()
-        
+
         try:
             key = self._get_metadata_key(conversation_id)
-            data = await asyncio.to_thread(self.redis_client.get, key)
-            
+            metadata = await self.redis_client.hgetall(key)
+
+            if metadata:
+                metadata["message_count"] = int(metadata["message_count"])
+                metadata["ttl"] = int(metadata["ttl"])
+            return metadata
+
+        except Exception as e:
+            logger.error("Error retrieving metadata for conversation %s: %s", conversation_id, e)
+            return {}
+
+    async def get_summary(self, conversation_id: str) -> Dict[str, Any]:
+        """
+        Get the rolling summary of the older messages of a conversation.
+
+        Args:
+            conversation_id: Unique conversation identifier
+
+        Returns:
+            Summary dictionary with "content" and "covered_until" (timestamp of the
+            last summarized message), or an empty dictionary if there is none
+        """
+        if not self.redis_client:
+            await self.connect()
+
+        try:
+            data = await self.redis_client.get(self._get_summary_key(conversation_id))
+
             if data:
-                return json.loads(data)
+                return orjson.loads(data)
             return {}
-            
+
         except Exception as e:
-            logger.error(f"Error retrieving metadata for conversation {conversation_id}: {e}")
+            logger.error("Error retrieving summary for conversation %s: %s", conversation_id, e)
             return {}
-    
-    async def cleanup_expired_conversations(self) -> int:
+
+    async def set_summary(
+        self,
+        conversation_id: str,
+        summary: Dict[str, Any],
+        ttl: Optional[int] = None
+    ) -> bool:
         """
-        Clean up expired conversations.
-        
+        Save the rolling summary of a conversation.
+
+        Args:
+            conversation_id: Unique conversation identifier
+            summary: Summary dictionary
+            ttl: Time to live in seconds (optional)
+
         Returns:
-            Number of conversations cleaned up
+            True if saved successfully, False otherwise
         """
         if not self.redis_client:
             await self.connect()
-        
+
         try:
-            # Get all conversation keys
-            pattern = "conversation:*"
-            keys = await asyncio.to_thread(self.redis_client.keys, pattern)
-            
-            cleaned_count = 0
-            for key in keys:
-                ttl = await asyncio.to_thread(self.redis_client.ttl, key)
-                if ttl == -1:  # No expiration set
-                    # Set default expiration
-                    await asyncio.to_thread(self.redis_client.expire, key, self.default_ttl)
-                elif ttl == -2:  # Key doesn't exist
-                    cleaned_count += 1
-            
-            logger.info(f"Cleaned up {cleaned_count} expired conversations")
-            return cleaned_count
-            
+            key = self._get_summary_key(conversation_id)
+            await self.redis_client.setex(key, ttl or self.default_ttl, orjson.dumps(summary))
+            return True
+
         except Exception as e:
-            logger.error(f"Error during cleanup: {e}")
-            return 0
+            logger.error("Error saving summary for conversation %s: %s", conversation_id, e)
+            return False
+
+    async def cleanup_expired_conversations(self) -> int:
+        """
+        Report the conversations expired by Redis.
+
+        Every write sets a TTL, so Redis removes expired conversations on its
+        own and there is nothing to scan; watch_expirations counts them as
+        their expiry events arrive.
+
+        Returns:
+            Number of conversations expired since the store was created
+        """
+        return self.expired_count
+
+    async def watch_expirations(self, max_backoff: float = 60.0):
+        """
+        Count conversations expired by Redis until cancelled.
+        Requires key-event notifications for expired keys
+        (notify-keyspace-events "Ex") on the Redis server.
+        Lost connections are retried with exponential backoff.
+
+        Args:
+            max_backoff: Maximum delay in seconds between reconnection attempts
+        """
+        # Only expirations in the database this store writes to
+        channel = f"__keyevent@{self.pool.connection_kwargs.get('db', 0)}__:expired"
+        backoff = 1.0
+        while True:
+            if not self.redis_client:
+                await self.connect()
+
+            if self.redis_client:
+                pubsub = None
+                try:
+                    pubsub = self.redis_client.pubsub()
+                    await pubsub.subscribe(channel)
+                    backoff = 1.0
+                    async for message in pubsub.listen():
+                        if message["type"] == "message" and message["data"].startswith("conversation:"):
+                            self.expired_count += 1
+                except Exception as e:
+                    logger.error("Error watching conversation expirations: %s", e)
+                finally:
+                    if pubsub is not None:
+                        await pubsub.aclose()
+
+            logger.info("Retrying expiration watch in %.0f seconds", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
 
 # Singleton instance
 _conversation_store = None
@@ -263,6 +373,6 @@ async def get_conversation_store() -> ConversationStore:
     """
     global _conversation_store
     if _conversation_store is None:
-        _conversation_store = ConversationStore()
+        _conversation_store = RedisConversationStore()
         await _conversation_store.connect()
-    return _conversation_store
\ No newline at end of file
+    return _conversation_store
@@ -1,11 +1,46 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
+import httpx
+import openai
 from langchain.llms import BaseLLM
 from langchain.chat_models import ChatOpenAI
-from langchain.schema import HumanMessage, SystemMessage, AIMessage
+from langchain.schema import BaseMessage, HumanMessage, SystemMessage, AIMessage
 from langchain.callbacks.manager import CallbackManager
 from langchain.callbacks.streaming_stdout import StreamingStdOutCallbackHandler
 
-from config.config import settings
+from config.config import get_settings
+
+# openai>=1.0 clients accept a shared httpx connection pool
+_OPENAI_V1 = int(openai.__version__.split(".")[0]) >= 1
+
+# Default system prompt for VerdeMuse assistant, built once and shared by all calls
+_DEFAULT_SYSTEM_MESSAGE = SystemMessage(content=(
+    "You are the VerdeMuse Customer Support Assistant, an AI designed to help customers with questions "
+    "about VerdeMuse's sustainable products. Be friendly, concise, and helpful. Always prioritize accurate information "
+    "and admit when you don't know something rather than making up answers."
+))
+
+# LangChain message class for each conversation role
+_ROLE_TO_MSG = {
+    "user": HumanMessage,
+    "assistant": AIMessage,
+    "system": SystemMessage
+}
+
+# Static part of the context-enhanced system prompt; the documents are appended to it
+_SYSTEM_PROMPT_PREFIX = (
+    "You are the VerdeMuse Customer Support Assistant, an AI designed to help customers with questions "
+    "about VerdeMuse's sustainable products. Be friendly, concise, and helpful.\n\n"
+    "Use the following context to answer the user's question. If the context doesn't contain relevant information, "
+    "admit that you don't know rather than making up an answer.\n\n"
+    "Context:\n"
+)
+
+# HTTP connections are shared by all calls so requests reuse keep-alive
+# HTTP/2 connections instead of paying DNS and TLS setup each time.
+# The pools are created with the shared client, not at import.
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=100)
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
 
 class MistralClient:
     """
@@ -13,14 +48,23 @@ class MistralClient:
     This class provides methods to generate responses and perform tasks with the LLM.
     """
     
-    def __init__(self, api_key: Optional[str] = None, streaming: bool = False):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        streaming: bool = False,
+        http_client: Optional[httpx.Client] = None,
+        async_http_client: Optional[httpx.AsyncClient] = None
+    ):
         """
         Initialize the Mistral client.
         
         Args:
             api_key: Optional API key for Mistral API. If None, uses config setting.
             streaming: Whether to stream responses or not.
+            http_client: Optional HTTP connection pool for sync calls
+            async_http_client: Optional HTTP connection pool for async calls
         """
+        settings = get_settings()
         self.api_key = api_key or settings.MISTRAL_API_KEY
         
         # For now, using OpenAI client with model switching as placeholder
@@ -29,22 +73,41 @@ class MistralClient:
         if streaming:
             callbacks = CallbackManager([StreamingStdOutCallbackHandler()])
         
+        clients = {}
+        if _OPENAI_V1 and http_client is not None and async_http_client is not None:
+            clients = {
+                "client": openai.OpenAI(api_key=self.api_key, http_client=http_client).chat.completions,
+                "async_client": openai.AsyncOpenAI(
+                    api_key=self.api_key,
+                    http_client=async_http_client
+                ).chat.completions
+            }
+        
         self.llm = ChatOpenAI(
             api_key=self.api_key, 
             model_name="mistral-medium",  # Will use actual Mistral model when integrated
             streaming=streaming,
             callback_manager=callbacks,
-            temperature=0.7
+            temperature=0.7,
+            **clients
+        )
+        
+        # A smaller model is enough to condense old turns of a conversation
+        self.summary_llm = ChatOpenAI(
+            api_key=self.api_key,
+            model_name=settings.CONVERSATION_SUMMARY_MODEL,
+            temperature=0,
+            **clients
         )
     
-    def generate_response(
+    def _build_messages(
         self, 
         user_message: str, 
         conversation_history: Optional[List[Dict[str, str]]] = None,
         system_prompt: Optional[str] = None
-    ) -> str:
+    ) -> List[BaseMessage]:
         """
-        Generate a response from the LLM.
+        Build the message list sent to the LLM.
         
         Args:
             user_message: The user's message
@@ -52,33 +115,58 @@ class MistralClient:
             system_prompt: Optional system prompt
             
         Returns:
-            The LLM's response
+            List of LangChain messages
         """
-        messages = []
+        # Use the system prompt if provided, else the shared default one
+        messages = [SystemMessage(content=system_prompt) if system_prompt else _DEFAULT_SYSTEM_MESSAGE]
         
-        # Add system prompt if provided
-        if system_prompt:
-            messages.append(SystemMessage(content=system_prompt))
-        else:
-            # Default system prompt for VerdeMuse assistant
-            default_prompt = """You are the VerdeMuse Customer Support Assistant, an AI designed to help customers with questions 
-            about VerdeMuse's sustainable products. Be friendly, concise, and helpful. Always prioritize accurate information 
-            and admit when you don't know something rather than making up answers."""
-            messages.append(SystemMessage(content=default_prompt))
-        
-        # Add conversation history
+        # Add conversation history, skipping messages with unknown roles
         if conversation_history:
-            for message in conversation_history:
-                if message["role"] == "user":
-                    messages.append(HumanMessage(content=message["content"]))
-                elif message["role"] == "assistant":
-                    messages.append(AIMessage(content=message["content"]))
-                elif message["role"] == "system":
-                    messages.append(SystemMessage(content=message["content"]))
+            messages.extend(
+                _ROLE_TO_MSG[message["role"]](content=message["content"])
+                for message in conversation_history
+                if message["role"] in _ROLE_TO_MSG
+            )
         
         # Add current user message
         messages.append(HumanMessage(content=user_message))
         
+        return messages
+    
+    def _build_context_prompt(self, context_documents: List[str]) -> str:
+        """
+        Build a system prompt that embeds the given context documents.
+        
+        Args:
+            context_documents: List of context documents to inform the LLM
+            
+        Returns:
+            The context-enhanced system prompt
+        """
+        # Combine context documents into a single string and append it to the static prefix
+        return _SYSTEM_PROMPT_PREFIX + "\n\n".join(
+            f"Document {i}: {doc}" for i, doc in enumerate(context_documents, 1)
+        )
+    
+    def generate_response(
+        self, 
+        user_message: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        system_prompt: Optional[str] = None
+    ) -> str:
+        """
+        Generate a response from the LLM.
+        
+        Args:
+            user_message: The user's message
+            conversation_history: Optional list of previous messages in the conversation
+            system_prompt: Optional system prompt
+            
+        Returns:
+            The LLM's response
+        """
+        messages = self._build_messages(user_message, conversation_history, system_prompt)
+        
         # Generate response
         response = self.llm.invoke(messages)
         
@@ -101,29 +189,149 @@ class MistralClient:
         Returns:
             The LLM's response incorporating the context
         """
-        # Combine context documents into a single string
-        context = "\n\n".join([f"Document {i+1}: {doc}" for i, doc in enumerate(context_documents)])
+        # Generate response with the context-enhanced system prompt
+        system_prompt = self._build_context_prompt(context_documents)
+        return self.generate_response(user_message, conversation_history, system_prompt)
+    
+    async def agenerate_response(
+        self, 
+        user_message: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        system_prompt: Optional[str] = None
+    ) -> str:
+        """
+        Generate a response from the LLM without blocking the event loop.
+        
+        Args:
+            user_message: The user's message
+            conversation_history: Optional list of previous messages in the conversation
+            system_prompt: Optional system prompt
+            
+        Returns:
+            The LLM's response
+        """
+        messages = self._build_messages(user_message, conversation_history, system_prompt)
+        
+        response = await self.llm.ainvoke(messages)
+        
+        return response.content
+    
+    async def agenerate_answer_with_context(
+        self, 
+        user_message: str, 
+        context_documents: List[str],
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> str:
+        """
+        Generate a response from the LLM with relevant context documents without blocking the event loop.
+        
+        Args:
+            user_message: The user's message
+            context_documents: List of context documents to inform the LLM
+            conversation_history: Optional list of previous messages in the conversation
+            
+        Returns:
+            The LLM's response incorporating the context
+        """
+        system_prompt = self._build_context_prompt(context_documents)
+        return await self.agenerate_response(user_message, conversation_history, system_prompt)
+    
+    async def generate_response_stream(
+        self, 
+        user_message: str, 
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM chunk by chunk.
+        
+        Args:
+            user_message: The user's message
+            conversation_history: Optional list of previous messages in the conversation
+            system_prompt: Optional system prompt
+            
+        Yields:
+            Chunks of the LLM's response as they are generated
+        """
+        messages = self._build_messages(user_message, conversation_history, system_prompt)
         
-        # Create system prompt with context
-        system_prompt = f"""You are the VerdeMuse Customer Support Assistant, an AI designed to help customers with questions 
-        about VerdeMuse's sustainable products. Be friendly, concise, and helpful.
+        async for chunk in self.llm.astream(messages):
+            if chunk.content:
+                yield chunk.content
+    
+    async def generate_answer_with_context_stream(
+        self, 
+        user_message: str, 
+        context_documents: List[str],
+        conversation_history: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM with relevant context documents.
         
-        Use the following context to answer the user's question. If the context doesn't contain relevant information, 
-        admit that you don't know rather than making up an answer.
+        Args:
+            user_message: The user's message
+            context_documents: List of context documents to inform the LLM
+            conversation_history: Optional list of previous messages in the conversation
+            
+        Yields:
+            Chunks of the LLM's response as they are generated
+        """
+        system_prompt = self._build_context_prompt(context_documents)
+        async for chunk in self.generate_response_stream(user_message, conversation_history, system_prompt):
+            yield chunk
+
+    async def asummarize_conversation(
+        self,
+        messages: List[Dict[str, str]],
+        previous_summary: Optional[str] = None
+    ) -> str:
+        """
+        Condense older conversation messages into a short summary.
         
-        Context:
-        {context}
+        Args:
+            messages: Messages to fold into the summary, oldest first
+            previous_summary: Optional summary of the messages before them
+            
+        Returns:
+            The updated summary
         """
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+        if previous_summary:
+            transcript = f"Summary so far: {previous_summary}\n\n{transcript}"
         
-        # Generate response with the context-enhanced system prompt
-        return self.generate_response(user_message, conversation_history, system_prompt)
+        response = await self.summary_llm.ainvoke([
+            SystemMessage(content="Summarize this customer support conversation in a few sentences. "
+                                  "Keep the products, questions and facts the assistant may need later."),
+            HumanMessage(content=transcript)
+        ])
+        
+        return response.content
 
-# Create a singleton instance
-mistral_client = MistralClient()
+# Singleton instance, created on first use
+_mistral_client: Optional[MistralClient] = None
 
 def get_mistral_client() -> MistralClient:
     """
     Returns the Mistral client instance.
     This can be used as a FastAPI dependency.
     """
-    return mistral_client
\ No newline at end of file
+    global _mistral_client, _http_client, _async_http_client
+    if _mistral_client is None:
+        _http_client = httpx.Client(http2=True, limits=_HTTP_LIMITS, timeout=60)
+        _async_http_client = httpx.AsyncClient(http2=True, limits=_HTTP_LIMITS, timeout=60)
+        _mistral_client = MistralClient(http_client=_http_client, async_http_client=_async_http_client)
+    return _mistral_client
+
+async def close_http_clients() -> None:
+    """
+    Close the shared HTTP connection pools.
+    The client is rebuilt with new pools on the next get_mistral_client call.
+    """
+    global _mistral_client, _http_client, _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+    _mistral_client = None
+    _http_client = None
+    _async_http_client = None
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Response cache implementation for VerdeMuse.
+Provides a Redis-based cache of LLM responses shared across API workers.
+"""
+
+import redis.asyncio as redis
+import os
+from typing import Optional
+import logging
+from config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Redis-based cache of LLM responses keyed by message and context hashes.
+    Entries expire on their own, so the cache needs no cleanup.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, ttl: Optional[int] = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            redis_url: Redis connection URL. If None, uses environment variables.
+            ttl: Time to live of cached responses in seconds. If None, uses config setting.
+        """
+        self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.ttl = ttl or get_settings().RESPONSE_CACHE_TTL
+        # Operations beyond max_connections wait up to timeout for a free connection
+        self.pool = redis.BlockingConnectionPool.from_url(
+            self.redis_url,
+            max_connections=get_settings().REDIS_MAX_CONNECTIONS,
+            timeout=get_settings().REDIS_POOL_TIMEOUT,
+            decode_responses=True,
+            socket_keepalive=True,
+            health_check_interval=30
+        )
+        self.redis_client = None
+
+    async def connect(self):
+        """Establish Redis connection."""
+        if self.redis_client is None:
+            try:
+                self.redis_client = redis.Redis(connection_pool=self.pool)
+                # Test connection
+                await self.redis_client.ping()
+            except Exception as e:
+                logger.error("Failed to connect to Redis: %s", e)
+                self.redis_client = None
+
+    async def disconnect(self):
+        """Close Redis connection and the connections held by the pool."""
+        if self.redis_client:
+            await self.redis_client.aclose()
+            self.redis_client = None
+        await self.pool.aclose()
+
+    def _get_cache_key(self, message_hash: bytes, context_hash: bytes) -> bytes:
+        """Generate Redis key for a cached response."""
+        return b"chatcache:" + message_hash + b":" + context_hash
+
+    async def get(self, message_hash: bytes, context_hash: bytes) -> Optional[str]:
+        """
+        Get a cached response.
+
+        Args:
+            message_hash: Hash of the normalized user message
+            context_hash: Hash of the retrieved context documents
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        if not self.redis_client:
+            await self.connect()
+
+        try:
+            return await self.redis_client.get(self._get_cache_key(message_hash, context_hash))
+        except Exception as e:
+            logger.error("Error reading cached response: %s", e)
+            return None
+
+    async def set(self, message_hash: bytes, context_hash: bytes, response: str) -> bool:
+        """
+        Cache a response.
+
+        Args:
+            message_hash: Hash of the normalized user message
+            context_hash: Hash of the retrieved context documents
+            response: The LLM response to cache
+
+        Returns:
+            True if cached successfully, False otherwise
+        """
+        if not self.redis_client:
+            await self.connect()
+
+        try:
+            await self.redis_client.setex(self._get_cache_key(message_hash, context_hash), self.ttl, response)
+            return True
+        except Exception as e:
+            logger.error("Error caching response: %s", e)
+            return False
+
+# Singleton instance
+_response_cache = None
+
+async def get_response_cache() -> ResponseCache:
+    """
+    Get the response cache instance.
+    This can be used as a FastAPI dependency.
+    """
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+        await _response_cache.connect()
+    return _response_cache
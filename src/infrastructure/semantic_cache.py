@@ -0,0 +1,108 @@
+"""
+Semantic cache implementation for VerdeMuse.
+Reuses an LLM response when a new query means the same as a previous one,
+even if it is worded differently.
+"""
+
+import itertools
+from typing import Optional
+import numpy as np
+import faiss
+from cachetools import TTLCache
+from config.config import get_settings
+
+class SemanticCache:
+    """
+    In-process cache of LLM responses keyed by query embedding.
+
+    Query embeddings are indexed in an HNSW graph while the responses live in
+    a bounded TTLCache. Entries evicted from the TTLCache are skipped at lookup
+    and dropped from the graph the next time it is rebuilt.
+    """
+
+    def __init__(self, threshold: Optional[float] = None, maxsize: int = 1000, ttl: int = 3600):
+        """
+        Initialize the semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit. If None, uses config setting.
+            maxsize: Maximum number of cached responses
+            ttl: Time to live of cached responses in seconds
+        """
+        self.threshold = threshold or get_settings().SEMANTIC_CACHE_THRESHOLD
+        self.entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.index = None
+        self.hits = 0
+        self._ids = itertools.count()
+
+    def _create_index(self, dimension: int) -> faiss.Index:
+        """Create an empty HNSW index over normalized embeddings, so inner product is cosine similarity."""
+        return faiss.IndexIDMap(faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT))
+
+    def get(self, query_vector: np.ndarray, context_hash: bytes) -> Optional[str]:
+        """
+        Get the response cached for a similar query answered from the same context.
+
+        Args:
+            query_vector: Normalized embedding of the query
+            context_hash: Hash of the retrieved context documents
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return None
+
+        scores, ids = self.index.search(query_vector.reshape(1, -1), 4)
+        for score, entry_id in zip(scores[0], ids[0]):
+            if entry_id < 0 or score < self.threshold:
+                break
+            entry = self.entries.get(int(entry_id))
+            if entry is not None and entry[1] == context_hash:
+                self.hits += 1
+                return entry[2]
+        return None
+
+    def set(self, query_vector: np.ndarray, context_hash: bytes, response: str) -> None:
+        """
+        Cache a response under its query embedding.
+
+        Args:
+            query_vector: Normalized embedding of the query
+            context_hash: Hash of the retrieved context documents
+            response: The LLM response to cache
+        """
+        vector = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        if self.index is None:
+            self.index = self._create_index(vector.shape[1])
+        elif self.index.ntotal >= 2 * self.entries.maxsize:
+            self._rebuild()
+
+        entry_id = next(self._ids)
+        self.entries[entry_id] = (vector, context_hash, response)
+        self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+
+    def _rebuild(self) -> None:
+        """Rebuild the index from the live entries, since HNSW graphs cannot remove vectors."""
+        self.entries.expire()
+        live = list(self.entries.items())
+        self.index = self._create_index(self.index.d)
+        if live:
+            ids = np.array([entry_id for entry_id, _ in live], dtype=np.int64)
+            self.index.add_with_ids(np.vstack([entry[0] for _, entry in live]), ids)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+# Singleton instance
+_semantic_cache = None
+
+def get_semantic_cache() -> SemanticCache:
+    """
+    Get the semantic cache instance.
+    This can be used as a FastAPI dependency.
+    """
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
@@ -0,0 +1,108 @@
+"""
+Micro-batching for concurrent requests.
+Calls that arrive within a few milliseconds of each other are processed
+together in one batch, the way embedding servers batch their requests.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+class MicroBatcher:
+    """
+    Collect concurrently submitted items into batches of up to max_batch,
+    waiting at most max_wait seconds after the first item of a batch, and
+    process each batch with a single call.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch: int = 32,
+        max_wait: float = 0.005
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            process: Coroutine function mapping a batch of items to their results, in order
+            max_batch: Maximum number of items per batch
+            max_wait: Maximum time in seconds to wait for a batch to fill
+        """
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Submit an item and wait for its result.
+
+        Args:
+            item: Item to process
+
+        Returns:
+            The result of the item, or raises the exception its batch raised
+        """
+        loop = asyncio.get_running_loop()
+        # The queue and worker belong to the loop that first used them
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def aclose(self) -> None:
+        """Stop the worker, failing the items it holds or still has queued."""
+        worker, queue = self._worker, self._queue
+        self._worker, self._queue = None, None
+        if worker is None:
+            return
+        worker.cancel()
+        if worker.get_loop() is asyncio.get_running_loop():
+            await asyncio.gather(worker, return_exceptions=True)
+        while not queue.empty():
+            _, future = queue.get_nowait()
+            self._fail([future])
+
+    @staticmethod
+    def _fail(futures: List[asyncio.Future]) -> None:
+        """Fail pending futures because the batcher was closed."""
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError("MicroBatcher was closed"))
+
+    async def _run(self) -> None:
+        """Process batches until cancelled."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                try:
+                    results = await self.process([item for item, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+        except asyncio.CancelledError:
+            # Callers waiting on the batch in flight would otherwise hang
+            self._fail([future for _, future in batch])
+            raise
@@ -0,0 +1,241 @@
+"""
+Embedding models for the vector store.
+Embeddings are computed in-process with sentence-transformers or an int8
+ONNX export of the same model, or by a remote Infinity server that batches
+concurrent requests on its side.
+"""
+
+import os
+import json
+import logging
+from typing import Callable, List, Optional
+import numpy as np
+import httpx
+from langchain.embeddings import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
+
+from config.config import Settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Tokens kept per text by sentence-transformers for EMBEDDING_MODEL
+MAX_SEQ_LENGTH = 256
+
+def encode_sorted(
+    texts: List[str],
+    encode_batch: Callable[[List[str]], np.ndarray],
+    batch_size: int = 32
+) -> np.ndarray:
+    """
+    Encode texts sorted by length, so each batch is padded only to the
+    longest of a group of similar texts, and restore the input order.
+
+    Args:
+        texts: List of text strings to embed
+        encode_batch: Function mapping a batch of texts to a float32 matrix of embeddings
+        batch_size: Number of consecutive sorted texts encoded together
+
+    Returns:
+        Float32 matrix of embeddings, one row per text in input order
+    """
+    order = np.argsort([len(text) for text in texts])
+    vectors = None
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        batch_vectors = encode_batch([texts[i] for i in batch])
+        if vectors is None:
+            vectors = np.empty((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+        vectors[batch] = batch_vectors
+    if vectors is None:
+        return np.empty((0, 0), dtype=np.float32)
+    return vectors
+
+class FastHuggingFaceEmbeddings(HuggingFaceEmbeddings):
+    """
+    HuggingFace embeddings whose transformer runs with fused attention and
+    LayerNorm kernels (BetterTransformer) and, optionally, compiled with
+    torch.compile. Outputs match the eager model.
+    """
+
+    compile_model: bool = False
+    """Whether to compile the transformer with torch.compile."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        transformer = self.client[0]
+        try:
+            from optimum.bettertransformer import BetterTransformer
+            transformer.auto_model = BetterTransformer.transform(transformer.auto_model)
+        except Exception as e:
+            # Missing optimum, or a transformers release whose models already use fused attention
+            logger.info("Using the transformer without BetterTransformer: %s", e)
+
+        if self.compile_model:
+            # Compiles in place, so the module keeps its place in the pipeline; dynamic
+            # shapes let batches padded to different lengths share one graph
+            transformer.auto_model.compile(dynamic=True)
+
+
+class InfinityEmbeddings(Embeddings):
+    """
+    Embeddings computed by an Infinity server (https://github.com/michaelfeil/infinity)
+    through its OpenAI-compatible /embeddings endpoint.
+    """
+
+    def __init__(self, url: str, model: str = EMBEDDING_MODEL, batch_size: int = 32, timeout: float = 60):
+        """
+        Initialize the Infinity embeddings client.
+
+        Args:
+            url: Base URL of the Infinity server, e.g. http://infinity:7997
+            model: Name of the model served by Infinity
+            batch_size: Number of texts sent per request
+            timeout: Request timeout in seconds
+        """
+        self.model = model
+        self.batch_size = batch_size
+        # One client for all requests, so connections are kept alive
+        self.client = httpx.Client(base_url=url, timeout=timeout)
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts and normalize the vectors."""
+        response = self.client.post("/embeddings", json={"model": self.model, "input": texts})
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda item: item["index"])
+        vectors = np.array([item["embedding"] for item in data], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches of batch_size.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            List of normalized embeddings, one per text in input order
+        """
+        if not texts:
+            return []
+        return np.vstack([
+            self._embed(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query.
+
+        Args:
+            text: Query string
+
+        Returns:
+            Normalized embedding of the query
+        """
+        return self._embed([text])[0].tolist()
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Embeddings computed with ONNX Runtime from a dynamically int8-quantized
+    export of the sentence-transformers model (see scripts/export_onnx.py).
+    Mean pooling and normalization match the sentence-transformers model.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        file_name: str = "model_quantized.onnx",
+        batch_size: int = 32,
+        max_length: Optional[int] = None
+    ):
+        """
+        Initialize the ONNX embeddings model.
+
+        Args:
+            model_dir: Directory holding the exported model and its tokenizer
+            file_name: Name of the ONNX model file in model_dir
+            batch_size: Number of texts encoded per model call
+            max_length: Tokens kept per text. If None, uses max_seq_length from the
+                sentence_bert_config.json in model_dir, or MAX_SEQ_LENGTH
+        """
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.batch_size = batch_size
+        self.max_length = max_length or self._read_max_length(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, file_name),
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @staticmethod
+    def _read_max_length(model_dir: str) -> int:
+        """Read the sequence length sentence-transformers truncates to, so both backends agree."""
+        config_path = os.path.join(model_dir, "sentence_bert_config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                return json.load(f).get("max_seq_length", MAX_SEQ_LENGTH)
+        return MAX_SEQ_LENGTH
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Embed one batch of texts, padded to its longest text only, and normalize the vectors."""
+        inputs = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feed = {name: value.astype(np.int64) for name, value in inputs.items() if name in self._input_names}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        mask = inputs["attention_mask"][..., np.newaxis].astype(np.float32)
+        vectors = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed texts in batches of similar length to minimize padding.
+
+        Args:
+            texts: List of text strings to embed
+
+        Returns:
+            List of normalized embeddings, one per text in input order
+        """
+        if not texts:
+            return []
+        return encode_sorted(texts, self._embed, self.batch_size).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a single query.
+
+        Args:
+            text: Query string
+
+        Returns:
+            Normalized embedding of the query
+        """
+        return self._embed([text])[0].tolist()
+
+def create_embeddings(settings: Settings) -> Embeddings:
+    """
+    Create the embedding model selected by the EMBEDDINGS_BACKEND setting.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Infinity embeddings for "infinity", int8 ONNX embeddings for "onnx",
+        otherwise in-process HuggingFace embeddings
+    """
+    if settings.EMBEDDINGS_BACKEND == "infinity":
+        return InfinityEmbeddings(settings.INFINITY_URL)
+    if settings.EMBEDDINGS_BACKEND == "onnx":
+        return OnnxEmbeddings(settings.ONNX_MODEL_DIR)
+    return FastHuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        encode_kwargs={"normalize_embeddings": True},
+        compile_model=settings.EMBEDDINGS_COMPILE
+    )
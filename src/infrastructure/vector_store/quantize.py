@@ -0,0 +1,62 @@
+"""
+Scalar quantization helpers for embedding vectors.
+Vectors are stored as int8 with one symmetric scale per vector.
+"""
+
+from typing import Tuple
+import numpy as np
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize float vectors to int8 with a per-vector symmetric scale.
+
+    Args:
+        vectors: Float matrix with one vector per row (a single vector is also accepted)
+
+    Returns:
+        Tuple of the int8 matrix and the float16 scale of each row
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float16)
+
+# Rows scored per block; the upcast copy of a block stays in cache
+BLOCK_ROWS = 1024
+
+def int8_inner_product(
+    query: np.ndarray,
+    query_scale: np.ndarray,
+    vectors: np.ndarray,
+    scales: np.ndarray
+) -> np.ndarray:
+    """
+    Approximate inner products between quantized vectors and a quantized query.
+
+    The int8 matrix is scored in blocks of BLOCK_ROWS rows, each upcast into
+    one reused buffer, so a query reads the int8 bytes once and allocates no
+    full-size copy.
+
+    Args:
+        query: int8 query vector of shape (1, d)
+        query_scale: Scale of the query vector
+        vectors: int8 matrix of shape (n, d)
+        scales: Scale of each row in vectors
+
+    Returns:
+        Float32 array of n approximate inner products
+    """
+    n, dimension = vectors.shape
+    # int8 products would overflow; float32 sums them exactly (with BLAS) while
+    # they stay below 2**24, otherwise accumulate in int32
+    dtype = np.float32 if dimension * 127 * 127 < 2 ** 24 else np.int32
+    query_row = query[0].astype(dtype)
+    dots = np.empty(n, dtype=dtype)
+    block = np.empty((min(BLOCK_ROWS, n), dimension), dtype=dtype)
+    for start in range(0, n, BLOCK_ROWS):
+        rows = vectors[start:start + BLOCK_ROWS]
+        buffer = block[:len(rows)]
+        np.copyto(buffer, rows)
+        np.matmul(buffer, query_row, out=dots[start:start + len(rows)])
+    return dots.astype(np.float32, copy=False) * (scales.astype(np.float32) * np.float32(query_scale[0]))
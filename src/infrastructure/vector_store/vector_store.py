@@ -1,31 +1,116 @@
 import os
-from typing import List, Dict, Any, Optional
+import asyncio
+import pickle
+import shelve
+import shutil
+import hashlib
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 import numpy as np
 import faiss
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import FAISS
 from langchain.docstore.document import Document
 
-from config.config import settings
+from config.config import get_settings
+from src.infrastructure.vector_store.batching import MicroBatcher
+from src.infrastructure.vector_store.embeddings import create_embeddings, encode_sorted, HuggingFaceEmbeddings
+from src.infrastructure.vector_store.quantize import quantize_int8, int8_inner_product
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; without it every search goes through FAISS
+    njit = None
+    prange = range
+
+logger = logging.getLogger(__name__)
+
+def _topk_ip(db: np.ndarray, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact top-k inner product search over a float32 matrix.
+    
+    Args:
+        db: C-contiguous float32 matrix with one vector per row
+        q: Float32 query vector
+        k: Number of results to return
+        
+    Returns:
+        Scores and row indices of the k best rows, best first; -1 pads missing rows
+    """
+    n, d = db.shape
+    scores = np.empty(n, dtype=np.float32)
+    for i in prange(n):
+        acc = np.float32(0.0)
+        for j in range(d):
+            acc += db[i, j] * q[j]
+        scores[i] = acc
+    
+    # Insertion into a sorted buffer of size k; k is small
+    # Seeded with the lowest finite float: fastmath assumes no infinities
+    top_scores = np.full(k, np.finfo(np.float32).min, dtype=np.float32)
+    top_ids = np.full(k, -1, dtype=np.int64)
+    for i in range(n):
+        score = scores[i]
+        if score > top_scores[k - 1]:
+            j = k - 1
+            while j > 0 and top_scores[j - 1] < score:
+                top_scores[j] = top_scores[j - 1]
+                top_ids[j] = top_ids[j - 1]
+                j -= 1
+            top_scores[j] = score
+            top_ids[j] = i
+    return top_scores, top_ids
+
+if njit is not None:
+    _topk_ip = njit(parallel=True, fastmath=True, cache=True)(_topk_ip)
 
 class VectorStore:
     """
     Vector store implementation using FAISS for efficient similarity search.
     This class provides methods to store, retrieve, and search embeddings.
+    
+    Documents are kept in plain lists aligned with the positions of their
+    vectors in the FAISS index, so a search result maps to its text and
+    metadata by list indexing.
     """
     
-    def __init__(self, persist_directory: Optional[str] = None):
+    def __init__(self, persist_directory: Optional[str] = None, use_gpu: Optional[bool] = None, mmap: bool = True):
         """
         Initialize the vector store with embeddings model.
         
         Args:
             persist_directory: Directory to persist vector store. If None, uses config setting.
+            use_gpu: Whether to search on all available GPUs. If None, uses config setting.
+            mmap: Whether to memory-map the inverted lists of a persisted IVF index
+                instead of reading them into memory
         """
+        settings = get_settings()
         self.persist_directory = persist_directory or settings.VECTOR_DB_PATH
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
-        self.vector_store = None
+        self.embeddings = create_embeddings(settings)
+        self._index = None
+        self._texts: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self.quantization = settings.VECTOR_QUANTIZATION
+        self._quantized = None
+        self._vecs = None
+        self._gpu_index = None
+        self.small_corpus_size = settings.VECTOR_SMALL_CORPUS_SIZE if njit is not None else 0
+        self.index_type = settings.VECTOR_INDEX_TYPE
+        self.hnsw_m = settings.HNSW_M
+        self.hnsw_ef_construction = settings.HNSW_EF_CONSTRUCTION
+        self.hnsw_ef_search = settings.HNSW_EF_SEARCH
+        self.ivf_nlist = settings.IVF_NLIST
+        self.ivf_nprobe = settings.IVF_NPROBE
+        self.pq_m = settings.PQ_M
+        self.pq_nbits = settings.PQ_NBITS
+        self.sq_type = settings.SQ_TYPE
+        self.use_gpu = settings.VECTOR_USE_GPU if use_gpu is None else use_gpu
+        self.mmap = mmap
+        self._mapped = False
+        self._search_batcher = MicroBatcher(self._search_batch)
         
         # Ensure directory exists
         os.makedirs(self.persist_directory, exist_ok=True)
@@ -38,12 +123,12 @@ class VectorStore:
             texts: List of text strings to embed
             metadatas: Optional list of metadata dictionaries corresponding to each text
         """
-        self.vector_store = FAISS.from_texts(
-            texts=texts,
-            embedding=self.embeddings,
-            metadatas=metadatas
-        )
+        self._index = None
+        doc_ids = self.add_embeddings(self._encode_sorted(texts), texts, metadatas)
         self.persist()
+        with shelve.open(self._seen_path()) as seen:
+            for text, doc_id in zip(texts, doc_ids):
+                seen[hashlib.sha1(text.encode()).hexdigest()] = doc_id
     
     def add_texts(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
         """
@@ -53,15 +138,320 @@ class VectorStore:
             texts: List of text strings to add
             metadatas: Optional list of metadata dictionaries for each text
             
+        Returns:
+            List of IDs for the texts, in input order; a text that was already
+            added gets the ID of its indexed document and is not embedded again
+        """
+        hashes = [hashlib.sha1(text.encode()).hexdigest() for text in texts]
+        with shelve.open(self._seen_path()) as seen:
+            doc_ids = {}
+            new_positions = []
+            for position, content_hash in enumerate(hashes):
+                if content_hash in doc_ids:
+                    continue
+                # Entries whose document was deleted or never loaded are embedded again
+                doc_id = seen.get(content_hash)
+                if doc_id is not None and doc_id in self._positions:
+                    doc_ids[content_hash] = doc_id
+                else:
+                    doc_ids[content_hash] = None
+                    new_positions.append(position)
+            
+            if new_positions:
+                new_texts = [texts[i] for i in new_positions]
+                new_metadatas = [metadatas[i] for i in new_positions] if metadatas else None
+                initial = self._index is None
+                new_ids = self.add_embeddings(self._encode_sorted(new_texts), new_texts, new_metadatas)
+                if initial:
+                    self.persist()
+                for position, doc_id in zip(new_positions, new_ids):
+                    doc_ids[hashes[position]] = doc_id
+                    seen[hashes[position]] = doc_id
+        
+        return [doc_ids[content_hash] for content_hash in hashes]
+    
+    def _seen_path(self) -> str:
+        """
+        Path of the on-disk map from the SHA1 of each added text to its document ID.
+        It is opened only while adding texts, so processes that only search never lock it.
+        """
+        return os.path.join(self.persist_directory, "seen.db")
+
+    async def add_texts_streaming(
+        self,
+        iter_chunks: Iterable[Tuple[List[str], Optional[List[Dict[str, Any]]]]]
+    ) -> List[str]:
+        """
+        Add a stream of text chunks, embedding the next chunk while the
+        previous one is added to the index.
+        
+        Embedding runs in a worker thread and index additions in a single
+        dedicated thread, so FAISS (which releases the GIL) and the embeddings
+        backend work at the same time. At most two embedded chunks wait to be
+        added. The vector store is persisted once at the end.
+        
+        Args:
+            iter_chunks: Iterable of (texts, metadatas) pairs, metadatas may be None
+            
         Returns:
             List of IDs for the added texts
         """
-        if self.vector_store is None:
-            self.initialize_from_texts(texts, metadatas)
-            return ["0"]  # Return dummy ID for initial texts
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        loop = asyncio.get_running_loop()
+        
+        async def produce():
+            try:
+                for texts, metadatas in iter_chunks:
+                    vectors = await asyncio.to_thread(self._encode_sorted, texts)
+                    await queue.put((vectors, texts, metadatas))
+            finally:
+                await queue.put(None)
+        
+        producer = asyncio.create_task(produce())
+        ids = []
+        try:
+            # One worker keeps the additions in chunk order
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                while (item := await queue.get()) is not None:
+                    ids += await loop.run_in_executor(executor, self.add_embeddings, *item)
+            await producer
+        finally:
+            producer.cancel()
         
-        return self.vector_store.add_texts(texts, metadatas)
+        self.persist()
+        return ids
     
+    def embed_documents(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Embed texts in fixed-size batches of similar length to minimize padding.
+        
+        Args:
+            texts: List of text strings to embed
+            batch_size: Number of texts encoded per model call
+            
+        Returns:
+            Float32 matrix of normalized embeddings, one row per text in input order
+        """
+        return self._encode_sorted(texts, batch_size)
+    
+    def _encode_sorted(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Encode texts in length-sorted batches with the configured embeddings backend."""
+        return encode_sorted(texts, self._encode_batch, batch_size)
+    
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Encode one batch of texts with the configured embeddings backend."""
+        if isinstance(self.embeddings, HuggingFaceEmbeddings):
+            # Call the model directly to get a float32 matrix without list round-trips
+            return self.embeddings.client.encode(
+                texts,
+                batch_size=len(texts),
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=False
+            )
+        return np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+    
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Embed a single query.
+        
+        Args:
+            query: Query string
+            
+        Returns:
+            Float32 vector of the normalized query embedding
+        """
+        return np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+    
+    def _create_index(self, vectors: np.ndarray) -> faiss.Index:
+        """
+        Create an empty FAISS index of the configured type.
+        
+        Args:
+            vectors: Embedding matrix the index is first built from, used to
+                train the IVF-PQ quantizers
+            
+        Returns:
+            An exact flat index, a trained scalar quantizer index storing
+            float16 or 8-bit codes, an HNSW graph index, or a trained IVF-PQ index
+        """
+        dimension = vectors.shape[1]
+        if self.index_type == "sq":
+            # Vectors are added as float32 and stored as 2-byte or 1-byte codes
+            if self.sq_type == "8bit":
+                qtype = faiss.ScalarQuantizer.QT_8bit
+            else:
+                qtype = faiss.ScalarQuantizer.QT_fp16
+            index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_L2)
+            index.train(vectors)
+            return index
+        
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dimension, self.hnsw_m)
+            index.hnsw.efConstruction = self.hnsw_ef_construction
+            index.hnsw.efSearch = self.hnsw_ef_search
+            return index
+        
+        if self.index_type == "ivfpq":
+            # Training needs at least one vector per list and per PQ centroid
+            if len(vectors) < max(self.ivf_nlist, 2 ** self.pq_nbits):
+                logger.warning(
+                    "Too few vectors (%s) to train an IVF-PQ index; using a flat index",
+                    len(vectors)
+                )
+                return faiss.IndexFlatL2(dimension)
+            
+            quantizer = faiss.IndexFlatL2(dimension)
+            index = faiss.IndexIVFPQ(quantizer, dimension, self.ivf_nlist, self.pq_m, self.pq_nbits)
+            index.train(vectors)
+            index.nprobe = self.ivf_nprobe
+            # Keep ids addressable so documents can be removed and reconstructed
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return index
+        
+        return faiss.IndexFlatL2(dimension)
+    
+    def _configure_search(self, index: faiss.Index) -> None:
+        """Apply the configured search-time parameters to a loaded index."""
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = self.hnsw_ef_search
+        elif isinstance(index, faiss.IndexIVF):
+            index.nprobe = self.ivf_nprobe
+    
+    def add_embeddings(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ) -> List[str]:
+        """
+        Add pre-computed embeddings to the vector store without re-embedding the texts.
+        
+        Args:
+            vectors: Embedding matrix with one row per text
+            texts: List of text strings the embeddings were computed from
+            metadatas: Optional list of metadata dictionaries for each text
+            
+        Returns:
+            List of IDs for the added texts
+        """
+        if not texts:
+            return []
+        
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self._quantized = None
+        self._vecs = None
+        self._gpu_index = None
+        if self._index is None:
+            self._mapped = False
+            self._index = self._create_index(vectors)
+            self._texts, self._metas, self._ids, self._positions = [], [], [], {}
+        else:
+            self._ensure_writable()
+        
+        ids = [uuid.uuid4().hex for _ in texts]
+        self._index.add(vectors)
+        self._positions.update((doc_id, len(self._ids) + i) for i, doc_id in enumerate(ids))
+        self._texts.extend(texts)
+        self._metas.extend(metadatas or [{} for _ in texts])
+        self._ids.extend(ids)
+        return ids
+    
+    def _delete(self, doc_ids: List[str]) -> None:
+        """
+        Remove documents from the vector store.
+        
+        Flat and scalar quantizer indexes remove vectors in place and shift the
+        following ones down. HNSW graphs do not support removal, and IVF indexes
+        keep the original positions of the remaining vectors. Those indexes are
+        rebuilt from the vectors of the remaining documents instead; IVF indexes
+        keep their trained quantizers.
+        
+        Args:
+            doc_ids: IDs of the documents to remove
+        """
+        self._quantized = None
+        self._vecs = None
+        self._gpu_index = None
+        self._ensure_writable()
+        removed = {self._positions[doc_id] for doc_id in doc_ids if doc_id in self._positions}
+        kept = [position for position in range(len(self._ids)) if position not in removed]
+        
+        index = self._index
+        if isinstance(index, faiss.IndexFlatCodes):
+            index.remove_ids(np.array(sorted(removed), dtype=np.int64))
+        else:
+            vectors = np.empty((len(kept), index.d), dtype=np.float32)
+            for row, position in enumerate(kept):
+                vectors[row] = index.reconstruct(position)
+            
+            if isinstance(index, faiss.IndexIVFPQ):
+                new_index = self._empty_ivfpq(index)
+            else:
+                new_index = self._create_index(vectors)
+            self._configure_search(new_index)
+            if kept:
+                new_index.add(vectors)
+            self._index = new_index
+        
+        self._texts = [self._texts[position] for position in kept]
+        self._metas = [self._metas[position] for position in kept]
+        self._ids = [self._ids[position] for position in kept]
+        self._positions = {doc_id: position for position, doc_id in enumerate(self._ids)}
+    
+    @staticmethod
+    def _empty_ivfpq(index: faiss.IndexIVFPQ) -> faiss.IndexIVFPQ:
+        """
+        Build an empty IVF-PQ index with the trained coarse quantizer and
+        product quantizer of an existing one. A cleared copy of the index
+        would keep a direct map that misses some of the vectors added later.
+        """
+        quantizer = faiss.clone_index(index.quantizer)
+        new_index = faiss.IndexIVFPQ(quantizer, index.d, index.nlist, index.pq.M, index.pq.nbits)
+        new_index.pq = index.pq
+        new_index.is_trained = True
+        new_index.precompute_table()
+        new_index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return new_index
+    
+    def upsert(self, texts: List[str], metadatas: List[Dict[str, Any]]) -> List[str]:
+        """
+        Sync the vector store with the given texts using their "content_hash" metadata.
+
+        Only texts whose hash is not already indexed are embedded; indexed documents
+        whose hash is no longer present are removed.
+
+        Args:
+            texts: List of text strings
+            metadatas: List of metadata dictionaries, each carrying a "content_hash"
+
+        Returns:
+            List of IDs for the newly added texts
+        """
+        if self._index is None and not self.load():
+            ids = self.add_embeddings(self.embed_documents(texts), texts, metadatas)
+            self.persist()
+            return ids
+
+        incoming = {metadata["content_hash"] for metadata in metadatas}
+        indexed = {metadata.get("content_hash"): doc_id for doc_id, metadata in zip(self._ids, self._metas)}
+
+        stale_ids = [doc_id for content_hash, doc_id in indexed.items() if content_hash not in incoming]
+        new_items = [
+            (text, metadata) for text, metadata in zip(texts, metadatas)
+            if metadata["content_hash"] not in indexed
+        ]
+
+        if stale_ids:
+            self._delete(stale_ids)
+        ids = []
+        if new_items:
+            new_texts, new_metadatas = map(list, zip(*new_items))
+            ids = self.add_embeddings(self.embed_documents(new_texts), new_texts, new_metadatas)
+        if stale_ids or new_items:
+            self.persist()
+        return ids
+
     def similarity_search(self, query: str, k: int = 4) -> List[Document]:
         """
         Search for documents similar to the query.
@@ -73,51 +463,270 @@ class VectorStore:
         Returns:
             List of Documents most similar to the query
         """
-        if self.vector_store is None:
+        if self._index is None:
+            raise ValueError("Vector store is not initialized. Call initialize_from_texts first.")
+        
+        return self.similarity_search_by_vector(self.embed_query(query), k)
+    
+    def similarity_search_by_vector(self, vector: np.ndarray, k: int = 4) -> List[Document]:
+        """
+        Search for documents similar to an already embedded query.
+        
+        Args:
+            vector: Normalized query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of Documents most similar to the query
+        """
+        if self._index is None:
             raise ValueError("Vector store is not initialized. Call initialize_from_texts first.")
         
-        return self.vector_store.similarity_search(query, k=k)
+        if self.quantization == "int8":
+            return self._quantized_search(vector, k)
+        
+        if self._use_small_corpus_search():
+            return self._small_corpus_search(vector, k)
+        
+        return self.similarity_search_by_vectors(vector, k)[0]
+    
+    def _use_small_corpus_search(self) -> bool:
+        """Whether the index is small enough, and exact enough, for the JIT-compiled kernel."""
+        index = self._index
+        return index.ntotal < self.small_corpus_size and not isinstance(index, faiss.IndexIVF)
+    
+    def similarity_search_by_vectors(self, vectors: np.ndarray, k: int = 4) -> List[List[Document]]:
+        """
+        Search for documents similar to a batch of embedded queries in one index call.
+        
+        Args:
+            vectors: Float32 matrix of normalized query embeddings, one row per query
+            k: Number of results to return per query
+            
+        Returns:
+            One list of Documents per query, most similar first
+        """
+        if self._index is None:
+            raise ValueError("Vector store is not initialized. Call initialize_from_texts first.")
+        
+        queries = np.ascontiguousarray(np.atleast_2d(vectors), dtype=np.float32)
+        _, positions = self._search_index().search(queries, k)
+        return [[self._document(i) for i in row if i != -1] for row in positions]
+    
+    def _document(self, position: int) -> Document:
+        """Build the Document stored at an index position."""
+        return Document(page_content=self._texts[position], metadata=self._metas[position])
+    
+    def _search_index(self) -> faiss.Index:
+        """
+        Return the index to search: a GPU copy of the index when GPU search is
+        enabled and available, otherwise the index itself.
+        The copy is made lazily and dropped whenever the index changes.
+        """
+        index = self._index
+        if not self.use_gpu:
+            return index
+        
+        if self._gpu_index is None:
+            if not hasattr(faiss, "StandardGpuResources") or faiss.get_num_gpus() == 0:
+                logger.warning("GPU search requested but no GPU is available to faiss; searching on CPU")
+                self.use_gpu = False
+                return index
+            if isinstance(index, (faiss.IndexHNSW, faiss.IndexScalarQuantizer)):
+                logger.warning("%s indexes cannot be searched on GPU; searching on CPU", type(index).__name__)
+                self.use_gpu = False
+                return index
+            
+            options = faiss.GpuMultipleClonerOptions()
+            options.useFloat16 = True
+            options.useFloat16CoarseQuantizer = False
+            self._gpu_index = faiss.index_cpu_to_all_gpus(index, co=options)
+        return self._gpu_index
+    
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """Embed a single query in a worker thread, keeping the event loop free."""
+        return await asyncio.to_thread(self.embed_query, query)
+    
+    async def asimilarity_search_by_vector(self, vector: np.ndarray, k: int = 4) -> List[Document]:
+        """Search by vector in a worker thread; FAISS releases the GIL while searching."""
+        return await asyncio.to_thread(self.similarity_search_by_vector, vector, k)
+    
+    async def abatched_search(self, query: str, k: int = 4) -> Tuple[np.ndarray, List[Document]]:
+        """
+        Embed and search a query together with the queries submitted concurrently
+        with it, so each batch costs one model call and one index search.
+        
+        Args:
+            query: Query string
+            k: Number of results to return
+            
+        Returns:
+            The normalized query embedding and the Documents most similar to the query,
+            which are empty if the vector store is not initialized
+        """
+        return await self._search_batcher.submit((query, k))
+    
+    async def aclose(self) -> None:
+        """Stop the search batcher, failing searches that are still waiting."""
+        await self._search_batcher.aclose()
+    
+    async def _search_batch(self, items: List[Tuple[str, int]]) -> List[Tuple[np.ndarray, List[Document]]]:
+        """Embed and search a batch of (query, k) pairs in a worker thread."""
+        return await asyncio.to_thread(self._embed_and_search, items)
+    
+    def _embed_and_search(self, items: List[Tuple[str, int]]) -> List[Tuple[np.ndarray, List[Document]]]:
+        """Embed a batch of queries in one model call and search them in one index call."""
+        vectors = self._encode_sorted([query for query, _ in items])
+        if self._index is None:
+            results = [[] for _ in items]
+        elif self.quantization == "int8":
+            results = [self._quantized_search(vector, k) for vector, (_, k) in zip(vectors, items)]
+        elif self._use_small_corpus_search():
+            results = [self._small_corpus_search(vector, k) for vector, (_, k) in zip(vectors, items)]
+        else:
+            results = self.similarity_search_by_vectors(vectors, max(k for _, k in items))
+        return [(vector, docs[:k]) for vector, docs, (_, k) in zip(vectors, results, items)]
+    
+    def _small_corpus_search(self, vector: np.ndarray, k: int) -> List[Document]:
+        """
+        Exact top-k search with the JIT-compiled kernel, which avoids the FAISS
+        call overhead that dominates on small corpora.
+        
+        Args:
+            vector: Normalized query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of Documents most similar to the query
+        """
+        if self._vecs is None:
+            index = self._index
+            self._vecs = np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+        
+        # Vectors are normalized, so inner product ranks like the L2 distance of the index
+        _, top = _topk_ip(self._vecs, np.ascontiguousarray(vector, dtype=np.float32).ravel(), k)
+        
+        return [self._document(i) for i in top if i != -1]
+    
+    def _quantized_search(self, vector: np.ndarray, k: int) -> List[Document]:
+        """
+        Exact top-k search over an int8 copy of the indexed vectors.
+        
+        Args:
+            vector: Normalized query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of Documents most similar to the query
+        """
+        if self._quantized is None:
+            index = self._index
+            self._quantized = quantize_int8(index.reconstruct_n(0, index.ntotal))
+        
+        vectors, scales = self._quantized
+        k = min(k, len(vectors))
+        if k <= 0:
+            return []
+        query_vector, query_scale = quantize_int8(vector)
+        scores = int8_inner_product(query_vector, query_scale, vectors, scales)
+        
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        
+        return [self._document(i) for i in top]
     
     def persist(self) -> None:
         """
-        Save the vector store to disk.
+        Save the vector store to disk: the FAISS index, and the texts, metadata
+        and IDs of the documents in a pickled sidecar file.
+        
+        Each file is written next to its target and renamed over it, so other
+        processes that memory-mapped or are reading the previous files keep a
+        complete copy instead of seeing them truncated and rewritten.
         """
-        if self.vector_store is not None:
-            self.vector_store.save_local(self.persist_directory)
+        if self._index is None:
+            return
+        
+        index_path = self._index_path()
+        faiss.write_index(self._index, index_path + ".tmp")
+        documents_path = self._documents_path()
+        with open(documents_path + ".tmp", "wb") as f:
+            pickle.dump((self._texts, self._metas, self._ids), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(documents_path + ".tmp", documents_path)
     
     def load(self) -> bool:
         """
         Load the vector store from disk.
         
+        With mmap enabled, the inverted lists of an IVF index stay on disk and
+        are paged in as they are searched, so the page cache is shared between
+        processes. Other index types are always read into memory.
+        
         Returns:
             True if loaded successfully, False otherwise
         """
+        if not (os.path.exists(self._index_path()) and os.path.exists(self._documents_path())):
+            # Nothing has been persisted yet, as on a first ingest
+            logger.info("No vector store persisted in %s yet", self.persist_directory)
+            return False
+        
         try:
-            self.vector_store = FAISS.load_local(
-                self.persist_directory, 
-                self.embeddings
-            )
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.mmap else 0
+            index = faiss.read_index(self._index_path(), flags)
+            with open(self._documents_path(), "rb") as f:
+                texts, metas, ids = pickle.load(f)
+            # Read between the two renames of a concurrent persist
+            if len(ids) != index.ntotal:
+                raise ValueError(f"index holds {index.ntotal} vectors but {len(ids)} documents")
+            
+            self._index = index
+            self._texts, self._metas, self._ids = texts, metas, ids
+            self._positions = {doc_id: position for position, doc_id in enumerate(ids)}
+            self._mapped = self.mmap and isinstance(index, faiss.IndexIVF)
+            self._quantized = None
+            self._vecs = None
+            self._gpu_index = None
+            self._configure_search(index)
             return True
         except Exception as e:
-            print(f"Error loading vector store: {e}")
+            logger.error("Error loading vector store: %s", e)
             return False
+    
+    def _index_path(self) -> str:
+        """Path of the persisted FAISS index."""
+        return os.path.join(self.persist_directory, "index.faiss")
+    
+    def _documents_path(self) -> str:
+        """Path of the persisted document texts, metadata and IDs."""
+        return os.path.join(self.persist_directory, "documents.pkl")
+    
+    def _ensure_writable(self) -> None:
+        """Read a memory-mapped index fully into memory before it is modified."""
+        if self._mapped:
+            self._index = faiss.read_index(self._index_path())
+            self._configure_search(self._index)
+            self._mapped = False
         
     def clear(self) -> None:
         """
         Clear the vector store and remove persisted data.
         """
-        self.vector_store = None
-        for file in os.listdir(self.persist_directory):
-            file_path = os.path.join(self.persist_directory, file)
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-
-# Create a singleton instance
-vector_store = VectorStore()
+        self._index = None
+        self._texts, self._metas, self._ids, self._positions = [], [], [], {}
+        self._mapped = False
+        self._quantized = None
+        self._vecs = None
+        self._gpu_index = None
+        # Also removes the map of added texts
+        shutil.rmtree(self.persist_directory, ignore_errors=True)
+        os.makedirs(self.persist_directory, exist_ok=True)
 
+@lru_cache(maxsize=1)
 def get_vector_store() -> VectorStore:
     """
-    Returns the vector store instance.
+    Returns the vector store instance, created on first use so that importing
+    this module does not load the embedding model.
     This can be used as a FastAPI dependency.
     """
-    return vector_store
\ No newline at end of file
+    return VectorStore()
\ No newline at end of file
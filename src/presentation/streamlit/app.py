@@ -1,11 +1,13 @@
 import streamlit as st
 import httpx
 import asyncio
+import atexit
+import threading
 import json
 import os
 from dotenv import load_dotenv
-import hashlib
-from typing import Dict, Any, Optional
+from cachetools import TTLCache
+from typing import Dict, Any, List, Optional, Tuple
 
 # Load environment variables
 load_dotenv()
@@ -31,59 +33,75 @@ if "messages" not in st.session_state:
 if "conversation_id" not in st.session_state:
     st.session_state.conversation_id = None
 
-# Cache for API responses using session state
-def get_cached_response(message_hash: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
-    """Cache API responses based on message hash to avoid repeated calls."""
-    cache_key = f"cache_{message_hash}"
-    return st.session_state.get(cache_key, {})
+# Keys of the shared cache entries added by this session, and their count
+st.session_state.setdefault("_cache", {})
+st.session_state.setdefault("_cache_count", 0)
+
+def _error_response(message: str) -> Dict[str, Any]:
+    """Build the fallback response shown when the API call fails."""
+    return {
+        "message": message,
+        "conversation_id": st.session_state.conversation_id or "",
+        "sources": None
+    }
+
+@st.cache_resource
+def _get_response_cache() -> Tuple[TTLCache, threading.Lock]:
+    """
+    Create the response cache shared by all sessions of this process, keyed
+    by (message, conversation_id), and the lock that guards it.
+    """
+    return TTLCache(maxsize=1024, ttl=3600), threading.Lock()
+
+@st.cache_resource
+def _get_client() -> Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]:
+    """
+    Create the HTTP client shared by all sessions of this process, so API
+    calls reuse pooled connections, and the event loop it runs on.
+    The client's connections belong to that loop, which runs for the
+    lifetime of the process in a background thread.
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    client = httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=httpx.Timeout(30.0),  # 30 second timeout
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=8)
+    )
+    atexit.register(lambda: asyncio.run_coroutine_threadsafe(client.aclose(), loop).result(5))
+    return client, loop
+
+def _run(coro_fn, *args):
+    """Call coro_fn(client, *args) on the shared client's event loop and wait for its result."""
+    client, loop = _get_client()
+    return asyncio.run_coroutine_threadsafe(coro_fn(client, *args), loop).result()
 
 # Async function to call the API
-async def query_api_async(message: str) -> Dict[str, Any]:
+async def query_api_async(client: httpx.AsyncClient, message: str, conversation_id: Optional[str]) -> Dict[str, Any]:
     """
-    Asynchronously query the API with improved error handling and timeout.
+    Asynchronously query the API with a timeout.
+    Raises on error responses, timeouts and connection failures.
     """
-    try:
-        timeout = httpx.Timeout(30.0)  # 30 second timeout
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            response = await client.post(
-                f"{API_URL}/api/chat/",
-                json={
-                    "message": message,
-                    "conversation_id": st.session_state.conversation_id
-                },
-                headers={"Content-Type": "application/json"}
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                st.error(f"API Error: {response.status_code} - {response.text}")
-                return {
-                    "message": "Sorry, I encountered an error while processing your request.",
-                    "conversation_id": st.session_state.conversation_id or "",
-                    "sources": None
-                }
-    except httpx.TimeoutException:
-        st.error("Request timed out. Please try again.")
-        return {
-            "message": "Sorry, the request took too long. Please try again.",
-            "conversation_id": st.session_state.conversation_id or "",
-            "sources": None
-        }
-    except httpx.ConnectError:
-        st.error("Unable to connect to the backend service. Please check if the API is running.")
-        return {
-            "message": "Sorry, I couldn't connect to the backend service.",
-            "conversation_id": st.session_state.conversation_id or "",
-            "sources": None
-        }
-    except Exception as e:
-        st.error(f"Unexpected error: {str(e)}")
-        return {
-            "message": "Sorry, I encountered an unexpected error.",
-            "conversation_id": st.session_state.conversation_id or "",
-            "sources": None
-        }
+    response = await client.post(
+        "/api/chat/",
+        json={
+            "message": message,
+            "conversation_id": conversation_id
+        },
+        headers={"Content-Type": "application/json"}
+    )
+    response.raise_for_status()
+    return response.json()
+
+async def delete_conversation_async(client: httpx.AsyncClient, conversation_id: str) -> None:
+    """Delete a conversation from the API."""
+    await client.delete(f"/api/chat/{conversation_id}")
+
+async def test_connection_async(client: httpx.AsyncClient) -> bool:
+    """Check whether the API health endpoint responds."""
+    response = await client.get("/health", timeout=httpx.Timeout(5.0))
+    return response.status_code == 200
 
 # Synchronous wrapper for async function
 def query_api(message: str) -> Dict[str, Any]:
@@ -91,43 +109,61 @@ def query_api(message: str) -> Dict[str, Any]:
     Synchronous wrapper for the async API call.
     Uses caching to avoid repeated calls for the same message.
     """
-    # Create a hash of the message for caching
-    message_hash = hashlib.md5(f"{message}:{st.session_state.conversation_id}".encode()).hexdigest()
-    
-    # Check cache first
-    if f"cache_{message_hash}" in st.session_state:
-        return st.session_state[f"cache_{message_hash}"]
-    
-    # Make the API call
+    conversation_id = st.session_state.conversation_id
+    # The first message of a conversation is never cached, since its
+    # response carries the conversation ID the API creates for it
+    use_cache = conversation_id and st.session_state.get("cache_enabled", True)
+    cache, lock = _get_response_cache()
+    key = (message, conversation_id)
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(query_api_async(message))
-        loop.close()
+        if use_cache:
+            with lock:
+                result = cache.get(key)
+            if result is not None:
+                return result
         
-        # Cache the result
-        st.session_state[f"cache_{message_hash}"] = result
+        # Failed calls raise, so they are never cached
+        result = _run(query_api_async, message, conversation_id)
+        if use_cache:
+            with lock:
+                cache[key] = result
+            st.session_state["_cache"][key] = None
+            st.session_state["_cache_count"] = len(st.session_state["_cache"])
         return result
+    except httpx.HTTPStatusError as e:
+        st.error(f"API Error: {e.response.status_code} - {e.response.text}")
+        return _error_response("Sorry, I encountered an error while processing your request.")
+    except httpx.TimeoutException:
+        st.error("Request timed out. Please try again.")
+        return _error_response("Sorry, the request took too long. Please try again.")
+    except httpx.ConnectError:
+        st.error("Unable to connect to the backend service. Please check if the API is running.")
+        return _error_response("Sorry, I couldn't connect to the backend service.")
     except Exception as e:
-        st.error(f"Error in API call: {str(e)}")
-        return {
-            "message": "Sorry, I encountered an error while processing your request.",
-            "conversation_id": st.session_state.conversation_id or "",
-            "sources": None
-        }
+        st.error(f"Unexpected error: {str(e)}")
+        return _error_response("Sorry, I encountered an unexpected error.")
+
+def _render_sources(sources: List[Dict[str, Any]]) -> None:
+    """Display the sources of a response in an expander."""
+    with st.expander("📚 View sources"):
+        for idx, source in enumerate(sources):
+            st.markdown(f"**Source {idx+1}:**")
+            st.markdown(f"_{source['content']}_")
+            st.markdown("---")
+
+# Trim messages if over the limit set in the sidebar, before rendering them
+max_messages = st.session_state.get("max_messages", 50)
+if len(st.session_state.messages) > max_messages:
+    st.session_state.messages = st.session_state.messages[-max_messages:]
 
-# Display chat messages with improved rendering
-for message in st.session_state.messages:
+# Display at most max_messages chat messages
+for message in st.session_state.messages[-max_messages:]:
     with st.chat_message(message["role"]):
         st.write(message["content"])
         
         # If there are sources, display them in an expander
-        if "sources" in message and message["sources"]:
-            with st.expander("📚 View sources"):
-                for idx, source in enumerate(message["sources"]):
-                    st.markdown(f"**Source {idx+1}:**")
-                    st.markdown(f"_{source['content']}_")
-                    st.markdown("---")
+        if message.get("sources"):
+            _render_sources(message["sources"])
 
 # Chat input with improved UX
 if prompt := st.chat_input("How can I help you today?"):
@@ -155,11 +191,7 @@ if prompt := st.chat_input("How can I help you today?"):
             
             # Display sources if available
             if sources:
-                with st.expander("📚 View sources"):
-                    for idx, source in enumerate(sources):
-                        st.markdown(f"**Source {idx+1}:**")
-                        st.markdown(f"_{source['content']}_")
-                        st.markdown("---")
+                _render_sources(sources)
     
     # Add assistant response to chat history
     st.session_state.messages.append({
@@ -177,20 +209,13 @@ with st.sidebar:
     
     # Performance settings
     st.subheader("Performance")
-    cache_enabled = st.toggle("Enable response caching", value=True)
-    if not cache_enabled:
-        # Clear cache if disabled
-        for key in list(st.session_state.keys()):
-            if key.startswith("cache_"):
-                del st.session_state[key]
+    # Read by query_api on the next turn; disabling it bypasses the cache
+    st.toggle("Enable response caching", value=True, key="cache_enabled")
     
     # Conversation settings
     st.subheader("Conversation")
-    max_messages = st.slider("Max messages to display", min_value=10, max_value=100, value=50)
-    
-    # Trim messages if over limit
-    if len(st.session_state.messages) > max_messages:
-        st.session_state.messages = st.session_state.messages[-max_messages:]
+    # Read above, before the chat history is rendered
+    st.slider("Max messages to display", min_value=10, max_value=100, value=50, key="max_messages")
     
     # API settings
     st.subheader("API")
@@ -200,37 +225,28 @@ with st.sidebar:
     if st.button("🗑️ Clear Conversation", key="clear"):
         if st.session_state.conversation_id:
             try:
-                # Async delete call
-                async def delete_conversation():
-                    async with httpx.AsyncClient() as client:
-                        await client.delete(f"{API_URL}/api/chat/{st.session_state.conversation_id}")
-                
-                # Run the async delete
-                try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    loop.run_until_complete(delete_conversation())
-                    loop.close()
-                except:
-                    pass  # Ignore errors in cleanup
-            except:
-                pass
+                _run(delete_conversation_async, st.session_state.conversation_id)
+            except Exception:
+                pass  # Ignore errors in cleanup
         
         # Clear local state
         st.session_state.messages = []
         st.session_state.conversation_id = None
         
-        # Clear cache
-        for key in list(st.session_state.keys()):
-            if key.startswith("cache_"):
-                del st.session_state[key]
+        # Drop the cached responses of the deleted conversation
+        cache, lock = _get_response_cache()
+        with lock:
+            for key in st.session_state["_cache"]:
+                cache.pop(key, None)
+        st.session_state["_cache"].clear()
+        st.session_state["_cache_count"] = 0
         
         st.rerun()
     
     # Performance metrics
     st.subheader("📊 Performance")
     message_count = len(st.session_state.messages)
-    cache_count = len([k for k in st.session_state.keys() if k.startswith("cache_")])
+    cache_count = st.session_state["_cache_count"]
     
     col1, col2 = st.columns(2)
     with col1:
@@ -242,17 +258,7 @@ with st.sidebar:
     st.subheader("🔗 Connection")
     if st.button("Test API Connection"):
         try:
-            async def test_connection():
-                async with httpx.AsyncClient(timeout=httpx.Timeout(5.0)) as client:
-                    response = await client.get(f"{API_URL}/health")
-                    return response.status_code == 200
-            
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            is_connected = loop.run_until_complete(test_connection())
-            loop.close()
-            
-            if is_connected:
+            if _run(test_connection_async):
                 st.success("✅ API is connected")
             else:
                 st.error("❌ API is not responding")
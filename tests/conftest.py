@@ -0,0 +1,175 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from fastapi.testclient import TestClient
+from src.api import main
+from src.api.main import app
+from src.infrastructure.llm.mistral_client import get_mistral_client
+from src.infrastructure.vector_store import vector_store as vector_store_module
+from src.infrastructure.vector_store.vector_store import get_vector_store, VectorStore
+from src.infrastructure.conversation_store import get_conversation_store
+from src.infrastructure.response_cache import get_response_cache
+
+class HashEmbeddings(Embeddings):
+    """Deterministic random unit vectors seeded by the text, so tests need no model."""
+
+    dimension = 64
+
+    def __init__(self):
+        self.embedded = 0
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha1(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+class StubMistralClient:
+    """LLM client that echoes the user message, so tests need neither an API key nor network access."""
+
+    async def agenerate_response(self, user_message: str, conversation_history=None, system_prompt=None) -> str:
+        return f"Echo: {user_message}"
+
+    async def agenerate_answer_with_context(self, user_message: str, context_documents, conversation_history=None) -> str:
+        return f"Echo: {user_message}"
+
+    async def generate_response_stream(self, user_message: str, conversation_history=None, system_prompt=None):
+        for chunk in ("Echo: ", user_message):
+            yield chunk
+
+    async def generate_answer_with_context_stream(self, user_message: str, context_documents, conversation_history=None):
+        for chunk in ("Echo: ", user_message):
+            yield chunk
+
+    async def asummarize_conversation(self, messages: List[Dict[str, str]], previous_summary: Optional[str] = None) -> str:
+        return f"{len(messages)} messages"
+
+class StubVectorStore:
+    """Vector store without documents, so tests never load the embedding model."""
+
+    def load(self) -> bool:
+        return False
+
+    async def aclose(self) -> None:
+        pass
+
+    async def abatched_search(self, query: str, k: int = 4):
+        return np.asarray(HashEmbeddings().embed_query(query), dtype=np.float32), []
+
+    async def asimilarity_search_by_vector(self, vector: np.ndarray, k: int = 4):
+        return []
+
+class StubConversationStore:
+    """In-memory conversation store, so tests run without Redis."""
+
+    def __init__(self):
+        self.conversations: Dict[str, List[Dict[str, Any]]] = {}
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self.expired_count = 0
+
+    async def get_conversation(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        messages = self.conversations.get(conversation_id, [])
+        return messages[-limit:] if limit else list(messages)
+
+    async def add_message(self, conversation_id: str, message: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        return await self.add_messages(conversation_id, [message], ttl)
+
+    async def add_messages(self, conversation_id: str, messages: List[Dict[str, Any]], ttl: Optional[int] = None) -> bool:
+        for message in messages:
+            message.setdefault("timestamp", datetime.now().isoformat())
+        self.conversations.setdefault(conversation_id, []).extend(messages)
+        return True
+
+    async def delete_conversation(self, conversation_id: str) -> bool:
+        self.conversations.pop(conversation_id, None)
+        self.summaries.pop(conversation_id, None)
+        return True
+
+    async def get_conversation_metadata(self, conversation_id: str) -> Dict[str, Any]:
+        messages = self.conversations.get(conversation_id)
+        if not messages:
+            return {}
+        return {"conversation_id": conversation_id, "message_count": len(messages)}
+
+    async def get_summary(self, conversation_id: str) -> Dict[str, Any]:
+        return self.summaries.get(conversation_id, {})
+
+    async def set_summary(self, conversation_id: str, summary: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        self.summaries[conversation_id] = summary
+        return True
+
+    async def watch_expirations(self) -> None:
+        # Nothing expires; wait until the lifespan cancels the task
+        await asyncio.Event().wait()
+
+    async def cleanup_expired_conversations(self) -> int:
+        return 0
+
+    async def disconnect(self) -> None:
+        pass
+
+class StubResponseCache:
+    """Response cache that never hits, so tests run without Redis."""
+
+    async def get(self, message_hash: bytes, context_hash: bytes) -> Optional[str]:
+        return None
+
+    async def set(self, message_hash: bytes, context_hash: bytes, response: str) -> bool:
+        return False
+
+    async def disconnect(self) -> None:
+        pass
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Test client shared by the whole session, so the app lifespan runs once.
+    The LLM client and stores are replaced with stubs, so the tests run offline.
+    """
+    mistral_client = StubMistralClient()
+    vector_store = StubVectorStore()
+    conversation_store = StubConversationStore()
+    response_cache = StubResponseCache()
+
+    async def stub_conversation_store():
+        return conversation_store
+
+    async def stub_response_cache():
+        return response_cache
+
+    providers = {
+        get_mistral_client: lambda: mistral_client,
+        get_vector_store: lambda: vector_store,
+        get_conversation_store: stub_conversation_store,
+        get_response_cache: stub_response_cache
+    }
+    with pytest.MonkeyPatch.context() as patch:
+        # The lifespan calls the providers directly; routes resolve them through Depends
+        for provider, stub in providers.items():
+            patch.setattr(main, provider.__name__, stub)
+        app.dependency_overrides.update(providers)
+        try:
+            with TestClient(app) as test_client:
+                yield test_client
+        finally:
+            app.dependency_overrides.clear()
+
+@pytest.fixture
+def vector_store(tmp_path, monkeypatch):
+    """Empty flat vector store in a temporary directory, embedding with HashEmbeddings."""
+    monkeypatch.setattr(vector_store_module, "create_embeddings", lambda settings: HashEmbeddings())
+    store = VectorStore(persist_directory=str(tmp_path / "embeddings"))
+    store.index_type = "flat"
+    store.quantization = "none"
+    return store
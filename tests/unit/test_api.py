@@ -1,10 +1,4 @@
-import pytest
-from fastapi.testclient import TestClient
-from src.api.main import app
-
-client = TestClient(app)
-
-def test_root_endpoint():
+def test_root_endpoint(client):
     """Test that the root endpoint returns the correct response."""
     response = client.get("/")
     assert response.status_code == 200
@@ -14,7 +8,7 @@ def test_root_endpoint():
     assert "status" in data
     assert data["status"] == "online"
 
-def test_health_endpoint():
+def test_health_endpoint(client):
     """Test that the health endpoint returns a healthy status."""
     response = client.get("/health")
     assert response.status_code == 200
@@ -0,0 +1,36 @@
+import asyncio
+from src.infrastructure.vector_store.batching import MicroBatcher
+
+def test_micro_batcher_batches_concurrent_items():
+    """Test that concurrent submissions are processed together and get their own results."""
+    batches = []
+
+    async def process(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(process, max_batch=4)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+    assert asyncio.run(main()) == [i * 2 for i in range(10)]
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_micro_batcher_aclose_fails_pending_items():
+    """Test that closing the batcher fails the batch in flight instead of leaving it waiting."""
+    started = asyncio.Event()
+
+    async def process(items):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def main():
+        batcher = MicroBatcher(process)
+        pending = asyncio.ensure_future(batcher.submit(1))
+        await started.wait()
+        await batcher.aclose()
+        return await asyncio.gather(pending, return_exceptions=True)
+
+    [result] = asyncio.run(main())
+    assert isinstance(result, RuntimeError)
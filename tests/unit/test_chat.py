@@ -0,0 +1,69 @@
+import json
+from types import SimpleNamespace
+import pytest
+from src.api.routes import chat
+from tests.conftest import StubConversationStore, StubMistralClient
+
+def _events(body: str):
+    """Parse a server-sent event stream into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def test_chat_endpoint_records_the_turn(client):
+    """Test that a chat reply is returned and the user and assistant messages are stored together."""
+    response = client.post("/api/chat/", json={"message": "Hello from the chat test", "no_cache": True})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["message"] == "Echo: Hello from the chat test"
+
+    history = client.get(f"/api/chat/{data['conversation_id']}").json()
+    assert [(message["role"], message["content"]) for message in history] == [
+        ("user", "Hello from the chat test"),
+        ("assistant", "Echo: Hello from the chat test")
+    ]
+
+def test_chat_stream_endpoint_emits_events_and_records_reply(client):
+    """Test that the stream sends start, token and end events and stores the full reply."""
+    response = client.post("/api/chat/stream", json={"message": "Hello from the stream test"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "content-encoding" not in response.headers
+
+    events = _events(response.text)
+    assert [event for event, _ in events] == ["start", "token", "token", "end"]
+    conversation_id = events[0][1]["conversation_id"]
+    assert "".join(data["content"] for event, data in events if event == "token") == "Echo: Hello from the stream test"
+
+    history = client.get(f"/api/chat/{conversation_id}").json()
+    assert [message["role"] for message in history] == ["user", "assistant"]
+    assert history[-1]["content"] == "Echo: Hello from the stream test"
+
+async def test_load_history_folds_older_messages_into_the_summary():
+    """Test that a full window is halved into the summary and later turns see only the rest."""
+    store = StubConversationStore()
+    settings = SimpleNamespace(CONVERSATION_HISTORY_MAXLEN=4)
+    await store.add_messages("window", [
+        {"role": "user", "content": f"message {i}", "timestamp": f"2024-01-01T00:00:0{i}"}
+        for i in range(4)
+    ])
+
+    history = await chat.load_history("window", StubMistralClient(), store, settings)
+    assert [message["content"] for message in history] == [f"message {i}" for i in range(4)]
+    for task in list(chat._summary_tasks):
+        await task
+    assert store.summaries["window"] == {"content": "2 messages", "covered_until": "2024-01-01T00:00:01"}
+
+    history = await chat.load_history("window", StubMistralClient(), store, settings)
+    assert history[0] == {"role": "system", "content": "Summary so far: 2 messages"}
+    assert [message["content"] for message in history[1:]] == ["message 2", "message 3"]
+
+def test_chat_endpoint_ignores_unknown_request_fields(client):
+    """Test that extra fields sent by clients are ignored instead of rejected."""
+    response = client.post(
+        "/api/chat/",
+        json={"message": "Hello with an extra field", "no_cache": True, "client_version": "2.0"}
+    )
+    assert response.status_code == 200
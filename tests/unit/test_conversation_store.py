@@ -0,0 +1,52 @@
+import fakeredis
+import pytest
+from src.infrastructure.conversation_store import RedisConversationStore
+
+@pytest.fixture
+def store():
+    """Conversation store keeping five messages, backed by an in-memory fake Redis."""
+    store = RedisConversationStore(max_messages=5)
+    store.redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return store
+
+async def test_add_messages_appends_in_one_write_and_trims(store):
+    """Test that appended messages keep their order and only the most recent are kept."""
+    await store.add_messages("c1", [{"role": "user", "content": f"m{i}"} for i in range(3)])
+    await store.add_messages("c1", [{"role": "user", "content": f"m{i}"} for i in range(3, 7)])
+
+    messages = await store.get_conversation("c1")
+    assert [message["content"] for message in messages] == ["m2", "m3", "m4", "m5", "m6"]
+    assert all("timestamp" in message for message in messages)
+    assert [message["content"] for message in await store.get_conversation("c1", limit=2)] == ["m5", "m6"]
+
+async def test_add_messages_sets_ttls_and_metadata(store):
+    """Test that every key gets the TTL and the metadata counts all messages ever added."""
+    await store.set_summary("c2", {"content": "earlier", "covered_until": ""}, ttl=10)
+    await store.add_messages("c2", [{"role": "user", "content": f"m{i}"} for i in range(7)], ttl=600)
+
+    for key in ("conversation:c2", "conversation_meta:c2", "conversation_summary:c2"):
+        assert 590 < await store.redis_client.ttl(key) <= 600
+
+    metadata = await store.get_conversation_metadata("c2")
+    assert metadata["conversation_id"] == "c2"
+    assert metadata["message_count"] == 7
+    assert metadata["ttl"] == 600
+
+async def test_summary_round_trip_and_delete(store):
+    """Test that summaries are stored and deleting a conversation removes all of its keys."""
+    assert await store.get_summary("c3") == {}
+    await store.add_message("c3", {"role": "user", "content": "hi"})
+    await store.set_summary("c3", {"content": "greeting", "covered_until": "2024-01-01"})
+    assert await store.get_summary("c3") == {"content": "greeting", "covered_until": "2024-01-01"}
+
+    assert await store.delete_conversation("c3")
+    assert await store.redis_client.exists(
+        "conversation:c3", "conversation_meta:c3", "conversation_summary:c3"
+    ) == 0
+    assert await store.get_conversation_metadata("c3") == {}
+
+async def test_cleanup_reports_expirations_counted_by_the_watch(store):
+    """Test that cleanup reports the expiry events counted so far without scanning keys."""
+    await store.add_message("c4", {"role": "user", "content": "hi"})
+    store.expired_count = 3
+    assert await store.cleanup_expired_conversations() == 3
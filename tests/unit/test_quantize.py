@@ -0,0 +1,32 @@
+import numpy as np
+from src.infrastructure.vector_store.quantize import quantize_int8, int8_inner_product
+
+def test_quantize_int8_round_trip():
+    """Test that int8 quantization reconstructs vectors within one quantization step."""
+    vectors = np.random.default_rng(0).standard_normal((8, 384)).astype(np.float32)
+    quantized, scales = quantize_int8(vectors)
+    assert quantized.dtype == np.int8
+    assert scales.shape == (8,)
+    restored = quantized.astype(np.float32) * scales.astype(np.float32)[:, None]
+    assert np.abs(restored - vectors).max() <= scales.astype(np.float32).max()
+
+def test_int8_inner_product_ranks_like_float():
+    """Test that quantized inner products preserve the nearest neighbour."""
+    vectors = np.random.default_rng(1).standard_normal((50, 384)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    quantized, scales = quantize_int8(vectors)
+    query, query_scale = quantize_int8(vectors[7])
+    scores = int8_inner_product(query, query_scale, quantized, scales)
+    assert scores.dtype == np.float32
+    assert int(np.argmax(scores)) == 7
+    assert np.allclose(scores, vectors @ vectors[7], atol=1e-2)
+
+def test_int8_inner_product_spans_blocks():
+    """Test that scoring in row blocks matches a full int32 product across block boundaries."""
+    rng = np.random.default_rng(2)
+    vectors = rng.integers(-127, 128, size=(5000, 64), dtype=np.int8)
+    query = rng.integers(-127, 128, size=(1, 64), dtype=np.int8)
+    scales = np.ones(5000, dtype=np.float16)
+    scores = int8_inner_product(query, np.ones(1, dtype=np.float16), vectors, scales)
+    expected = vectors.astype(np.int32) @ query[0].astype(np.int32)
+    assert np.array_equal(scores, expected.astype(np.float32))
@@ -0,0 +1,27 @@
+import numpy as np
+from src.infrastructure.semantic_cache import SemanticCache
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_semantic_cache_hits_similar_query_with_same_context():
+    """Test that a close query with the same context hits and other contexts or queries miss."""
+    cache = SemanticCache(threshold=0.95)
+    cache.set(_unit([1, 0, 0, 0]), b"context", "cached answer")
+
+    assert cache.get(_unit([1, 0.05, 0, 0]), b"context") == "cached answer"
+    assert cache.get(_unit([1, 0.05, 0, 0]), b"other context") is None
+    assert cache.get(_unit([0, 1, 0, 0]), b"context") is None
+    assert cache.hits == 1
+
+def test_semantic_cache_rebuild_keeps_live_entries():
+    """Test that rebuilding the graph drops evicted entries and keeps the live ones."""
+    cache = SemanticCache(threshold=0.95, maxsize=2)
+    for i in range(5):
+        cache.set(_unit(np.eye(8)[i]), b"context", f"answer {i}")
+
+    assert len(cache) == 2
+    assert cache.index.ntotal < 5
+    assert cache.get(_unit(np.eye(8)[4]), b"context") == "answer 4"
+    assert cache.get(_unit(np.eye(8)[0]), b"context") is None
@@ -0,0 +1,42 @@
+import numpy as np
+from src.infrastructure.vector_store.vector_store import _topk_ip
+
+def _expected(db, q, k):
+    """Reference top-k: best score first, lower row first among equal scores."""
+    scores = db @ q
+    order = np.argsort(-scores, kind="stable")[:k]
+    return scores[order], order
+
+def test_topk_ip_matches_argsort():
+    """Test that the top-k kernel ranks rows like a full sort."""
+    rng = np.random.default_rng(0)
+    db = rng.standard_normal((200, 16)).astype(np.float32)
+    q = rng.standard_normal(16).astype(np.float32)
+    scores, ids = _topk_ip(db, q, 5)
+    expected_scores, expected_ids = _expected(db, q, 5)
+    assert np.array_equal(ids, expected_ids)
+    assert np.allclose(scores, expected_scores, atol=1e-4)
+
+def test_topk_ip_ties_keep_row_order():
+    """Test that rows with equal scores are returned in row order."""
+    db = np.array([[1, 0], [0, 1], [1, 0], [1, 0]], dtype=np.float32)
+    q = np.array([1, 0], dtype=np.float32)
+    _, ids = _topk_ip(db, q, 3)
+    assert ids.tolist() == [0, 2, 3]
+
+def test_topk_ip_k_equal_to_n():
+    """Test that asking for every row returns all rows sorted."""
+    rng = np.random.default_rng(1)
+    db = rng.standard_normal((7, 8)).astype(np.float32)
+    q = rng.standard_normal(8).astype(np.float32)
+    _, ids = _topk_ip(db, q, 7)
+    assert np.array_equal(ids, _expected(db, q, 7)[1])
+
+def test_topk_ip_k_larger_than_n_pads():
+    """Test that missing rows are padded with -1 when k exceeds the row count."""
+    rng = np.random.default_rng(2)
+    db = rng.standard_normal((3, 8)).astype(np.float32)
+    q = rng.standard_normal(8).astype(np.float32)
+    _, ids = _topk_ip(db, q, 5)
+    assert np.array_equal(ids[:3], _expected(db, q, 3)[1])
+    assert ids[3:].tolist() == [-1, -1]
@@ -0,0 +1,86 @@
+from src.infrastructure.vector_store.vector_store import VectorStore
+
+def _documents(count, prefix="doc"):
+    """Texts and their upsert metadata."""
+    texts = [f"{prefix} {i}" for i in range(count)]
+    return texts, [{"content_hash": text} for text in texts]
+
+def test_ivfpq_upsert_deletes_twice_after_reload(vector_store):
+    """Test that an IVF-PQ store rebuilt by one deletion can be reloaded and deleted from again."""
+    vector_store.index_type = "ivfpq"
+    vector_store.ivf_nlist = 4
+    vector_store.pq_m = 8
+    vector_store.pq_nbits = 4
+    texts, metadatas = _documents(300)
+    vector_store.upsert(texts, metadatas)
+    vector_store.upsert(texts[10:], metadatas[10:])
+
+    reloaded = VectorStore(persist_directory=vector_store.persist_directory)
+    reloaded.index_type = "ivfpq"
+    assert reloaded.load()
+    reloaded.upsert(texts[20:], metadatas[20:])
+    assert reloaded._index.ntotal == 280
+    assert reloaded._texts == texts[20:]
+
+def test_int8_search_handles_k_zero_and_empty_store(vector_store):
+    """Test that int8 search returns no results for k=0 or once every document is removed."""
+    vector_store.quantization = "int8"
+    texts, metadatas = _documents(5)
+    vector_store.upsert(texts, metadatas)
+    query = vector_store.embed_query(texts[2])
+    assert vector_store.similarity_search_by_vector(query, k=0) == []
+    assert vector_store.similarity_search_by_vector(query, k=1)[0].page_content == texts[2]
+
+    vector_store.upsert([], [])
+    assert vector_store.similarity_search_by_vector(query, k=3) == []
+
+def test_upsert_embeds_only_new_documents_and_removes_stale_ones(vector_store):
+    """Test that upsert keeps unchanged documents, embeds new ones and deletes missing ones."""
+    texts, metadatas = _documents(6)
+    vector_store.upsert(texts[:4], metadatas[:4])
+    assert vector_store.embeddings.embedded == 4
+
+    ids = vector_store.upsert(texts[2:], metadatas[2:])
+    assert len(ids) == 2
+    assert vector_store.embeddings.embedded == 6
+    assert vector_store._texts == texts[2:]
+    assert vector_store._index.ntotal == 4
+    assert vector_store.similarity_search(texts[3], k=1)[0].page_content == texts[3]
+
+def test_persist_and_load_round_trip(vector_store):
+    """Test that a persisted store loads with the same documents and search results."""
+    texts, metadatas = _documents(8)
+    vector_store.upsert(texts, metadatas)
+
+    reloaded = VectorStore(persist_directory=vector_store.persist_directory)
+    assert reloaded.load()
+    assert reloaded._texts == texts
+    assert reloaded._metas == metadatas
+    assert reloaded._ids == vector_store._ids
+    assert reloaded.similarity_search(texts[5], k=1)[0].page_content == texts[5]
+
+def test_load_without_persisted_files_returns_false(vector_store):
+    """Test that loading an empty directory reports that nothing was loaded."""
+    assert not vector_store.load()
+    assert vector_store._index is None
+
+def test_add_texts_skips_texts_added_before_a_restart(vector_store):
+    """Test that the text-hash map survives a reload and is removed by clear."""
+    ids = vector_store.add_texts(["alpha", "beta", "alpha"])
+    assert ids[0] == ids[2]
+    assert vector_store.embeddings.embedded == 2
+
+    reloaded = VectorStore(persist_directory=vector_store.persist_directory)
+    assert reloaded.load()
+    assert reloaded.add_texts(["beta", "gamma"])[0] == ids[1]
+    assert reloaded.embeddings.embedded == 1
+
+    reloaded.clear()
+    reloaded.add_texts(["beta"])
+    assert reloaded.embeddings.embedded == 2
+
+def test_first_upsert_does_not_log_an_error(vector_store, caplog):
+    """Test that a first ingest with nothing persisted yet logs no error."""
+    texts, metadatas = _documents(3)
+    vector_store.upsert(texts, metadatas)
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]